@@ -2,20 +2,18 @@ from __future__ import annotations
 
 from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import BusinessError
 from app.core.security import decode_access_token
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-) -> User:
+def _current_user(db: Session, credentials: HTTPAuthorizationCredentials | None) -> User:
     if credentials is None:
         raise BusinessError("请先登录", code=40100, status_code=401)
     payload = decode_access_token(credentials.credentials)
@@ -26,15 +24,52 @@ def get_current_user(
     return user
 
 
-def get_optional_user(
+def get_current_user(
     db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-) -> User | None:
+) -> User:
+    return _current_user(db, credentials)
+
+
+def get_current_user_read(
+    db: Session = Depends(get_read_db),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User:
+    # GET 路由用：与路由共用只读 session，不再为鉴权额外打开一个主库连接。
+    return _current_user(db, credentials)
+
+
+def _optional_user_id(credentials: HTTPAuthorizationCredentials | None) -> int | None:
     if credentials is None:
         return None
     try:
         payload = decode_access_token(credentials.credentials)
     except BusinessError:
         return None
-    user_id = int(payload.get("sub", 0) or 0)
-    return db.get(User, user_id)
+    return int(payload.get("sub", 0) or 0)
+
+
+def get_optional_user(
+    db: Session = Depends(get_read_db),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User | None:
+    # 与 GET 路由共用只读 session，不再为可选登录额外打开一个主库连接。
+    user_id = _optional_user_id(credentials)
+    return None if user_id is None else db.get(User, user_id)
+
+
+def get_optional_user_primary(
+    db: Session = Depends(get_db),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User | None:
+    # 写接口用：与路由共用主库 session。
+    user_id = _optional_user_id(credentials)
+    return None if user_id is None else db.get(User, user_id)
+
+
+async def get_optional_user_async(
+    db: AsyncSession = Depends(get_async_read_db),
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> User | None:
+    user_id = _optional_user_id(credentials)
+    return None if user_id is None else await db.get(User, user_id)
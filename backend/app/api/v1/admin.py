@@ -8,6 +8,7 @@ from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.api.deps import bearer_scheme
+from app.core.cache import cache
 from app.core.exceptions import BusinessError
 from app.core.response import success
 from app.core.security import create_access_token, decode_access_token
@@ -22,6 +23,12 @@ from app.schemas.admin import (
     UserAdminPayload,
 )
 from app.services import admin_service
+from app.services.counters import counter_buffer
+from app.services.feed_inbox import fanout_buffer
+from app.services.follow_service import follow_cache
+from app.services.history_buffer import history_buffer
+from app.services.reaction_cache import reaction_cache
+from app.services.trending import hot_score_decayer
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -50,6 +57,21 @@ def dashboard(_: dict = Depends(require_admin), db: Session = Depends(get_db)) -
     return success(admin_service.dashboard(db))
 
 
+@router.get("/cache/stats")
+def cache_stats(_: dict = Depends(require_admin)) -> dict:
+    return success(
+        {
+            "cache": cache.stats(),
+            "reactions": reaction_cache.stats(),
+            "counters": counter_buffer.stats(),
+            "history": history_buffer.stats(),
+            "trending": hot_score_decayer.stats(),
+            "fanout": fanout_buffer.stats(),
+            "follows": follow_cache.stats(),
+        }
+    )
+
+
 @router.get("/poems")
 def poems(
     page: int = Query(1, ge=1),
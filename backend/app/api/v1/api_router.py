@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from app.api.v1 import admin, auth, categories, feedback, favorites, feihualing, history, home, poems, square, users
+from app.api.v1 import admin, auth, categories, feedback, favorites, feihualing, history, home, poems, reactions, square, users
+from app.core.exceptions import BusinessError
 from app.core.response import success
+from app.services.warmup import is_ready
 
 api_router = APIRouter()
 
@@ -13,6 +15,13 @@ def health() -> dict:
     return success({"status": "ok"})
 
 
+@api_router.get("/health/ready", tags=["health"])
+def ready() -> dict:
+    if not is_ready():
+        raise BusinessError("缓存预热中", code=50300, status_code=503)
+    return success({"status": "ready"})
+
+
 api_router.include_router(auth.router)
 api_router.include_router(admin.router)
 api_router.include_router(users.router)
@@ -22,5 +31,6 @@ api_router.include_router(categories.router)
 api_router.include_router(favorites.router)
 api_router.include_router(history.router)
 api_router.include_router(square.router)
+api_router.include_router(reactions.router)
 api_router.include_router(feihualing.router)
 api_router.include_router(feedback.router)
@@ -1,28 +1,29 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_optional_user
-from app.core.response import success
+from app.core.http_cache import conditional_body, conditional_json, encode_cached, public_cache
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.services.poem_service import list_categories, list_category_poems
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("")
-def categories(db: Session = Depends(get_db)) -> dict:
-    return success(list_categories(db))
+def categories(request: Request, db: Session = Depends(get_read_db)) -> Response:
+    return conditional_body(request, encode_cached(list_categories(db)), public_cache(300))
 
 
 @router.get("/{category_id}/poems")
 def category_poems(
+    request: Request,
     category_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     user: User | None = Depends(get_optional_user),
-) -> dict:
-    return success(list_category_poems(db, category_id, user, page, page_size))
+) -> Response:
+    return conditional_json(request, list_category_poems(db, category_id, user, page, page_size))
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_read
+from app.core.http_cache import conditional_body, encode_cached, public_cache
 from app.core.response import success
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.schemas.feihualing import FeihualingCheckRequest, FeihualingRecordCreate, FeihualingRoomCreate
 from app.services import feihualing_service
 
@@ -14,8 +16,8 @@ router = APIRouter(prefix="/feihualing", tags=["feihualing"])
 
 
 @router.get("/keywords")
-def keywords(db: Session = Depends(get_db)) -> dict:
-    return success(feihualing_service.keywords(db))
+def keywords(request: Request, db: Session = Depends(get_read_db)) -> Response:
+    return conditional_body(request, encode_cached(feihualing_service.keywords(db)), public_cache(1800))
 
 
 @router.post("/check")
@@ -27,8 +29,8 @@ def check(payload: FeihualingCheckRequest, db: Session = Depends(get_db)) -> dic
 def records(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user_read),
 ) -> dict:
     return success(feihualing_service.list_records(db, user, page, page_size))
 
@@ -39,7 +41,7 @@ def save_record(payload: FeihualingRecordCreate, db: Session = Depends(get_db),
 
 
 @router.get("/rooms")
-def rooms(db: Session = Depends(get_db)) -> dict:
+def rooms(db: Session = Depends(get_read_db)) -> dict:
     return success(feihualing_service.list_rooms(db))
 
 
@@ -49,5 +51,5 @@ def create_room(payload: FeihualingRoomCreate, db: Session = Depends(get_db), us
 
 
 @router.get("/rooms/{room_id}")
-def room(room_id: int, db: Session = Depends(get_db)) -> dict:
-    return success(feihualing_service.get_room(db, room_id))
+async def room(room_id: int, db: AsyncSession = Depends(get_async_read_db)) -> dict:
+    return success(await feihualing_service.get_room_async(db, room_id))
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_optional_user
-from app.core.response import success
+from app.api.deps import get_optional_user_async
+from app.core.http_cache import conditional_body, conditional_json, encode_cached
 from app.db.models import User
-from app.db.session import get_db
-from app.services.poem_service import home_data
+from app.db.session import get_async_read_db
+from app.services.poem_service import home_data_async
 
 router = APIRouter(prefix="/home", tags=["home"])
 
 
 @router.get("")
-def get_home(db: Session = Depends(get_db), user: User | None = Depends(get_optional_user)) -> dict:
-    return success(home_data(db, user))
+async def get_home(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User | None = Depends(get_optional_user_async),
+) -> Response:
+    if user is None:
+        return conditional_body(request, encode_cached(await home_data_async(db, None)))
+    return conditional_json(request, await home_data_async(db, user))
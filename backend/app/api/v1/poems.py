@@ -1,42 +1,52 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_optional_user
+from app.api.deps import get_current_user, get_optional_user_async
+from app.core.http_cache import conditional_body, conditional_json, encode_cached
 from app.core.response import success
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db
 from app.services import poem_service
 
 router = APIRouter(prefix="/poems", tags=["poems"])
 
 
 @router.get("")
-def list_poems(
+async def list_poems(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     keyword: str | None = None,
-    db: Session = Depends(get_db),
-    user: User | None = Depends(get_optional_user),
+    tag: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User | None = Depends(get_optional_user_async),
 ) -> dict:
-    return success(poem_service.list_poems(db, user, page, page_size, keyword))
+    return success(await poem_service.list_poems_async(db, user, page, page_size, keyword, tag))
 
 
 @router.get("/search")
-def search_poems(
+async def search_poems(
     keyword: str = "",
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
-    user: User | None = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User | None = Depends(get_optional_user_async),
 ) -> dict:
-    return success(poem_service.list_poems(db, user, page, page_size, keyword))
+    return success(await poem_service.list_poems_async(db, user, page, page_size, keyword))
 
 
 @router.get("/{poem_id}")
-def poem_detail(poem_id: int, db: Session = Depends(get_db), user: User | None = Depends(get_optional_user)) -> dict:
-    return success(poem_service.get_poem_detail(db, poem_id, user))
+async def poem_detail(
+    request: Request,
+    poem_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User | None = Depends(get_optional_user_async),
+) -> Response:
+    if user is None:
+        return conditional_body(request, encode_cached(await poem_service.get_poem_detail_async(db, poem_id, None)))
+    return conditional_json(request, await poem_service.get_poem_detail_async(db, poem_id, user))
 
 
 @router.post("/{poem_id}/like")
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user
+from app.core.response import success
+from app.db.models import User
+from app.db.session import get_db
+from app.schemas.reaction import ReactionSyncRequest
+from app.services import reaction_service
+
+router = APIRouter(prefix="/reactions", tags=["reactions"])
+
+
+@router.post("/sync")
+def sync_reactions(payload: ReactionSyncRequest, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    return success(reaction_service.sync_reactions(db, user, payload.operations))
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, get_optional_user
+from app.api.deps import get_current_user, get_optional_user, get_optional_user_async
 from app.core.response import success
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_async_read_db, get_db, get_read_db
 from app.schemas.square import SquareCommentCreate, SquareTopicCreate
 from app.services import square_service
 
@@ -14,13 +17,15 @@ router = APIRouter(prefix="/square", tags=["square"])
 
 
 @router.get("/feed")
-def feed(
+async def feed(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
-    user: User | None = Depends(get_optional_user),
+    sort: Literal["latest", "hot"] = Query("latest"),
+    scope: Literal["all", "following"] = Query("all"),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: User | None = Depends(get_optional_user_async),
 ) -> dict:
-    return success(square_service.list_feed(db, user, page, page_size))
+    return success(await square_service.list_feed_async(db, user, page, page_size, sort, scope))
 
 
 @router.post("/feed")
@@ -29,26 +34,47 @@ def create_topic(payload: SquareTopicCreate, db: Session = Depends(get_db), user
 
 
 @router.get("/feed/{topic_id}")
-def topic(topic_id: int, db: Session = Depends(get_db), user: User | None = Depends(get_optional_user)) -> dict:
+def topic(topic_id: int, db: Session = Depends(get_read_db), user: User | None = Depends(get_optional_user)) -> dict:
     return success(square_service.get_topic(db, user, topic_id))
 
 
 @router.post("/feed/{topic_id}/like")
-def like_topic(topic_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
-    square_service.toggle_reaction(db, user, "topic", topic_id, "like")
-    return success(square_service.get_topic(db, user, topic_id))
+def like_topic(
+    topic_id: int,
+    compact: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    result = square_service.toggle_reaction(db, user, "topic", topic_id, "like")
+    return success(result if compact else square_service.get_topic(db, user, topic_id))
 
 
 @router.post("/feed/{topic_id}/favorite")
-def favorite_topic(topic_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
-    square_service.toggle_reaction(db, user, "topic", topic_id, "favorite")
-    return success(square_service.get_topic(db, user, topic_id))
+def favorite_topic(
+    topic_id: int,
+    compact: bool = Query(False),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> dict:
+    result = square_service.toggle_reaction(db, user, "topic", topic_id, "favorite")
+    return success(result if compact else square_service.get_topic(db, user, topic_id))
 
 
 @router.post("/feed/{topic_id}/share")
-def share_topic(topic_id: int, db: Session = Depends(get_db)) -> dict:
-    square_service.increase_share(db, topic_id)
-    return success(square_service.get_topic(db, None, topic_id))
+def share_topic(topic_id: int, compact: bool = Query(False), db: Session = Depends(get_db)) -> dict:
+    result = square_service.increase_share(db, topic_id)
+    return success(result if compact else square_service.get_topic(db, None, topic_id))
+
+
+@router.get("/feed/{topic_id}/comments")
+def comments(
+    topic_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: User | None = Depends(get_optional_user),
+) -> dict:
+    return success(square_service.list_comments(db, user, topic_id, cursor, limit))
 
 
 @router.post("/feed/{topic_id}/comments")
@@ -65,19 +91,21 @@ def comment_topic(
 def like_comment(
     topic_id: int,
     comment_id: int,
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> dict:
-    square_service.toggle_reaction(db, user, "comment", comment_id, "like")
-    return success(square_service.get_topic(db, user, topic_id))
+    result = square_service.toggle_reaction(db, user, "comment", comment_id, "like")
+    return success(result if compact else square_service.get_topic(db, user, topic_id))
 
 
 @router.post("/feed/{topic_id}/comments/{comment_id}/favorite")
 def favorite_comment(
     topic_id: int,
     comment_id: int,
+    compact: bool = Query(False),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> dict:
-    square_service.toggle_reaction(db, user, "comment", comment_id, "favorite")
-    return success(square_service.get_topic(db, user, topic_id))
+    result = square_service.toggle_reaction(db, user, "comment", comment_id, "favorite")
+    return success(result if compact else square_service.get_topic(db, user, topic_id))
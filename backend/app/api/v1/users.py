@@ -3,19 +3,19 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_read
 from app.core.response import success
 from app.db.models import User
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.user import UserUpdate
-from app.services import user_service
+from app.services import follow_service, user_service
 from app.services.serializers import user_detail
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/me")
-def me(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+def me(db: Session = Depends(get_read_db), user: User = Depends(get_current_user_read)) -> dict:
     return success(user_detail(user, user_service.get_user_stats(db, user.id)))
 
 
@@ -25,16 +25,46 @@ def update_me(payload: UserUpdate, db: Session = Depends(get_db), user: User = D
 
 
 @router.get("/me/overview")
-def overview(db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+def overview(db: Session = Depends(get_read_db), user: User = Depends(get_current_user_read)) -> dict:
     return success(user_service.get_overview(db, user))
 
 
+@router.post("/{user_id}/follow")
+def follow(user_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    return success(follow_service.follow_user(db, user, user_id))
+
+
+@router.delete("/{user_id}/follow")
+def unfollow(user_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)) -> dict:
+    return success(follow_service.unfollow_user(db, user, user_id))
+
+
 @router.get("/me/{item_type}")
 def profile_items(
     item_type: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+    user: User = Depends(get_current_user_read),
 ) -> dict:
     return success(user_service.get_profile_items(db, user, item_type, page, page_size))
+
+
+@router.get("/{user_id}/following")
+def following(
+    user_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+) -> dict:
+    return success(follow_service.list_follows(db, user_id, "following", cursor, limit))
+
+
+@router.get("/{user_id}/followers")
+def followers(
+    user_id: int,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+) -> dict:
+    return success(follow_service.list_follows(db, user_id, "followers", cursor, limit))
@@ -1,39 +1,272 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import threading
 import time
-from dataclasses import dataclass
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
+from app.core.config import settings
+from app.utils.pagination import clamp_page, clamp_page_size
+
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class CacheItem:
     value: Any
     expires_at: float
+    stale_at: float
+    # 由 value 派生、随条目一起失效的数据，目前用于编码后的响应字节。
+    encoded: Any = None
+
+
+class LeaderCancelled(Exception):
+    pass
+
+
+@dataclass
+class Flight:
+    event: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
 
 
+# 进程内 TTL 缓存；条目数超过 max_entries 时按最近最少使用淘汰，键空间再大内存也有上限。
 class LocalCache:
-    def __init__(self) -> None:
-        self._store: dict[str, CacheItem] = {}
+    def __init__(self, flight_timeout: float = 10.0, max_entries: int = 5000) -> None:
+        self._store: OrderedDict[str, CacheItem] = OrderedDict()
+        # id(value) -> key，用于按 payload 对象找回所在条目；条目移除时同步删除。
+        self._keys_by_value: dict[int, str] = {}
+        self._flights: dict[str, Flight] = {}
+        self._async_flights: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._metrics: Counter[str] = Counter()
+        self._executor: ThreadPoolExecutor | None = None
+        self.flight_timeout = flight_timeout
+        self.max_entries = max_entries
 
-    def get(self, key: str) -> Any | None:
+    def _lookup(self, key: str) -> CacheItem | None:
         item = self._store.get(key)
         if item is None:
             return None
         if item.expires_at < time.time():
-            self._store.pop(key, None)
+            self._pop(key)
             return None
-        return item.value
+        try:
+            self._store.move_to_end(key)
+        except KeyError:
+            # 并发的失效刚好删掉了这个条目，本次仍返回已读到的值。
+            pass
+        return item
+
+    def _pop(self, key: str) -> None:
+        item = self._store.pop(key, None)
+        if item is not None and self._keys_by_value.get(id(item.value)) == key:
+            del self._keys_by_value[id(item.value)]
+
+    def get(self, key: str) -> Any | None:
+        item = self._lookup(key)
+        return None if item is None else item.value
+
+    def set(self, key: str, value: Any, ttl: int = 300, stale_ttl: int | None = None) -> None:
+        now = time.time()
+        expires_at = now + ttl
+        stale_at = expires_at if stale_ttl is None else min(expires_at, now + stale_ttl)
+        with self._lock:
+            self._pop(key)
+            self._store[key] = CacheItem(value=value, expires_at=expires_at, stale_at=stale_at)
+            self._keys_by_value[id(value)] = key
+            while len(self._store) > self.max_entries:
+                self._pop(next(iter(self._store)))
+                self._metrics["evictions"] += 1
 
-    def set(self, key: str, value: Any, ttl: int = 300) -> None:
-        self._store[key] = CacheItem(value=value, expires_at=time.time() + ttl)
+    def derived(self, value: Any, build: Callable[[Any], Any]) -> Any:
+        # value 是当前缓存里的对象时，把 build(value) 记在同一条目上，随条目过期或失效一起清除；否则只计算不缓存。
+        key = self._keys_by_value.get(id(value))
+        item = self._lookup(key) if key is not None else None
+        if item is None or item.value is not value:
+            return build(value)
+        if item.encoded is None:
+            item.encoded = build(value)
+        return item.encoded
+
+    def get_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Any],
+        ttl: int = 300,
+        timeout: float | None = None,
+        stale_ttl: int | None = None,
+        refresh: Callable[[], Any] | None = None,
+    ) -> Any:
+        # ttl 是硬过期时间；传入 stale_ttl 和 refresh 后，软过期的数据先照常返回，再由后台线程用 refresh 重新计算。
+        item = self._lookup(key)
+        if item is not None:
+            if refresh is not None and item.stale_at < time.time():
+                self._refresh_in_background(key, refresh, ttl, stale_ttl)
+            return item.value
+        with self._lock:
+            value = self.get(key)
+            if value is not None:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+                generation = self._generation
+            else:
+                self._metrics["coalesced"] += 1
+
+        if not leader:
+            # 同一个 key 只让一个请求回源，其余请求等待它的结果；等待超时后自行回源兜底。
+            if flight.event.wait(self.flight_timeout if timeout is None else timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+            self._metrics["timeouts"] += 1
+            return loader()
+
+        return self._run_flight(key, flight, loader, ttl, stale_ttl, generation)
+
+    async def aget_or_set(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: int = 300,
+        timeout: float | None = None,
+        stale_ttl: int | None = None,
+        refresh: Callable[[], Any] | None = None,
+    ) -> Any:
+        # 协程版单飞：等待方 await 同一个 future，不会像 threading.Event.wait 那样阻塞事件循环。
+        item = self._lookup(key)
+        if item is not None:
+            if refresh is not None and item.stale_at < time.time():
+                self._refresh_in_background(key, refresh, ttl, stale_ttl)
+            return item.value
+        future = self._async_flights.get(key)
+        if future is not None and not future.done():
+            self._metrics["coalesced"] += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), self.flight_timeout if timeout is None else timeout)
+            except LeaderCancelled:
+                # 回源的请求被取消（如客户端断开），等待方重新竞争回源，由第一个接手的成为新的领头者。
+                return await self.aget_or_set(key, loader, ttl, timeout, stale_ttl, refresh)
+            except asyncio.TimeoutError:
+                self._metrics["timeouts"] += 1
+                return await loader()
+
+        future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        generation = self._generation
+        self._metrics["loads"] += 1
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            # 只取消领头者自己；等待方收到 LeaderCancelled 后各自接手，不会跟着被取消。
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as exc:
+            self._metrics["errors"] += 1
+            future.set_exception(exc)
+            future.exception()
+            raise
+        else:
+            if value is not None and generation == self._generation:
+                self.set(key, value, ttl, stale_ttl)
+            future.set_result(value)
+            return value
+        finally:
+            if self._async_flights.get(key) is future:
+                del self._async_flights[key]
+
+    def _run_flight(
+        self,
+        key: str,
+        flight: Flight,
+        loader: Callable[[], Any],
+        ttl: int,
+        stale_ttl: int | None,
+        generation: int,
+    ) -> Any:
+        self._metrics["loads"] += 1
+        try:
+            value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            self._metrics["errors"] += 1
+            raise
+        else:
+            flight.value = value
+            if value is not None and generation == self._generation:
+                self.set(key, value, ttl, stale_ttl)
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _refresh_in_background(self, key: str, refresh: Callable[[], Any], ttl: int, stale_ttl: int | None) -> None:
+        with self._lock:
+            self._metrics["stale_served"] += 1
+            if key in self._flights:
+                return
+            flight = self._flights[key] = Flight()
+            generation = self._generation
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+        self._metrics["refreshes"] += 1
+        self._executor.submit(self._refresh, key, flight, refresh, ttl, stale_ttl, generation)
+
+    def _refresh(
+        self,
+        key: str,
+        flight: Flight,
+        refresh: Callable[[], Any],
+        ttl: int,
+        stale_ttl: int | None,
+        generation: int,
+    ) -> None:
+        try:
+            self._run_flight(key, flight, refresh, ttl, stale_ttl, generation)
+        except Exception:
+            logger.exception("background refresh failed for cache key %s", key)
 
     def delete(self, key: str) -> None:
-        self._store.pop(key, None)
+        self._generation += 1
+        self._pop(key)
 
     def clear_prefix(self, prefix: str) -> None:
+        self._generation += 1
         for key in list(self._store.keys()):
             if key.startswith(prefix):
-                self._store.pop(key, None)
+                self._pop(key)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._store),
+            "inflight": len(self._flights) + len(self._async_flights),
+            "loads": self._metrics["loads"],
+            "coalesced": self._metrics["coalesced"],
+            "timeouts": self._metrics["timeouts"],
+            "errors": self._metrics["errors"],
+            "stale_served": self._metrics["stale_served"],
+            "refreshes": self._metrics["refreshes"],
+            "evictions": self._metrics["evictions"],
+        }
+
+
+def anonymous_list_key(prefix: str, user: Any, page: int, page_size: int, *parts: Any) -> str | None:
+    # 只缓存匿名访问的前几页；登录用户的列表带个人点赞收藏状态，不进共享缓存。
+    page = clamp_page(page)
+    if user is not None or page > settings.anon_list_cache_pages:
+        return None
+    return ":".join([prefix, *(str(part) for part in parts), str(page), str(clamp_page_size(page_size))])
 
 
-cache = LocalCache()
+cache = LocalCache(max_entries=settings.cache_max_entries)
@@ -11,36 +11,110 @@ class Settings:
     app_env: str
     api_v1_prefix: str
     database_url: str
+    read_database_url: str
+    async_database_url: str
+    async_read_database_url: str
+    read_db_primary_routes: frozenset[str]
     jwt_secret_key: str
     jwt_expire_minutes: int
     wx_appid: str
     wx_secret: str
     backend_dir: Path
     data_dir: Path
+    reaction_cache_users: int
+    reaction_cache_max_members: int
+    follow_cache_users: int
+    follow_cache_max_members: int
+    cache_warmup: str
+    cache_warmup_top_poems: int
+    counter_flush_interval_ms: int
+    poem_stats_shards: int
+    history_flush_interval_ms: int
+    history_max_per_user: int
+    hot_half_life_hours: float
+    hot_decay_interval_s: int
+    feed_fanout_interval_ms: int
+    feed_inbox_max_per_user: int
+    anon_list_cache_pages: int
+    cache_max_entries: int
+    sqlite_profile: str
+    sqlite_mmap_size: int
+    sqlite_cache_size: int
+    sqlite_busy_timeout_ms: int
+    db_pool_size: int
+    db_max_overflow: int
 
     @property
     def is_dev(self) -> bool:
         return self.app_env.lower() in {"dev", "development", "local"}
 
 
+def _sqlite_file(database_url: str) -> Path | None:
+    if not database_url.startswith("sqlite:///") or ":memory:" in database_url or "?" in database_url:
+        return None
+    return Path(database_url.removeprefix("sqlite:///"))
+
+
+def normalize_database_url(database_url: str, backend_dir: Path) -> str:
+    # SQLite 相对路径统一按 backend 目录解析，不随启动时的工作目录变化；读写引擎都从这个结果派生。
+    path = _sqlite_file(database_url)
+    if path is None or path.is_absolute():
+        return database_url
+    return f"sqlite:///{(backend_dir / path).resolve().as_posix()}"
+
+
+def default_read_url(database_url: str) -> str:
+    # SQLite 文件库默认以只读 URI（mode=ro）再开一个引擎；内存库和其他数据库不拆分，除非显式配置 READ_DATABASE_URL。
+    path = _sqlite_file(database_url)
+    if path is None:
+        return ""
+    return f"sqlite:///file:{path.as_posix()}?mode=ro&uri=true"
+
+
 def load_settings() -> Settings:
     backend_dir = Path(__file__).resolve().parents[2]
     data_dir = backend_dir / "data"
     data_dir.mkdir(parents=True, exist_ok=True)
 
-    database_url = os.getenv("DATABASE_URL", "sqlite:///./data/app.db")
+    database_url = normalize_database_url(os.getenv("DATABASE_URL", "sqlite:///./data/app.db"), backend_dir)
 
     return Settings(
         app_name=os.getenv("APP_NAME", "xingyu"),
         app_env=os.getenv("APP_ENV", "dev"),
         api_v1_prefix="/api/v1",
         database_url=database_url,
+        read_database_url=os.getenv("READ_DATABASE_URL", "") or default_read_url(database_url),
+        async_database_url=os.getenv("ASYNC_DATABASE_URL", ""),
+        async_read_database_url=os.getenv("ASYNC_READ_DATABASE_URL", ""),
+        read_db_primary_routes=frozenset(name.strip() for name in os.getenv("READ_DB_PRIMARY_ROUTES", "").split(",") if name.strip()),
         jwt_secret_key=os.getenv("JWT_SECRET_KEY", "dev-secret-change-me"),
         jwt_expire_minutes=int(os.getenv("JWT_EXPIRE_MINUTES", "10080")),
         wx_appid=os.getenv("WX_APPID", ""),
         wx_secret=os.getenv("WX_SECRET", ""),
         backend_dir=backend_dir,
         data_dir=data_dir,
+        reaction_cache_users=int(os.getenv("REACTION_CACHE_USERS", "2000")),
+        reaction_cache_max_members=int(os.getenv("REACTION_CACHE_MAX_MEMBERS", "20000")),
+        follow_cache_users=int(os.getenv("FOLLOW_CACHE_USERS", "2000")),
+        follow_cache_max_members=int(os.getenv("FOLLOW_CACHE_MAX_MEMBERS", "20000")),
+        cache_warmup=os.getenv("CACHE_WARMUP", "sync").lower(),
+        cache_warmup_top_poems=int(os.getenv("CACHE_WARMUP_TOP_POEMS", "20")),
+        counter_flush_interval_ms=int(os.getenv("COUNTER_FLUSH_INTERVAL_MS", "300")),
+        poem_stats_shards=max(1, int(os.getenv("POEM_STATS_SHARDS", "1"))),
+        history_flush_interval_ms=int(os.getenv("HISTORY_FLUSH_INTERVAL_MS", "1000")),
+        history_max_per_user=int(os.getenv("HISTORY_MAX_PER_USER", "200")),
+        hot_half_life_hours=float(os.getenv("HOT_HALF_LIFE_HOURS", "24")),
+        hot_decay_interval_s=int(os.getenv("HOT_DECAY_INTERVAL_S", "600")),
+        feed_fanout_interval_ms=int(os.getenv("FEED_FANOUT_INTERVAL_MS", "500")),
+        feed_inbox_max_per_user=int(os.getenv("FEED_INBOX_MAX_PER_USER", "500")),
+        anon_list_cache_pages=int(os.getenv("ANON_LIST_CACHE_PAGES", "3")),
+        cache_max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "5000")),
+        sqlite_profile=os.getenv("SQLITE_PROFILE", "performance").lower(),
+        sqlite_mmap_size=int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+        sqlite_cache_size=int(os.getenv("SQLITE_CACHE_SIZE", "-65536")),
+        sqlite_busy_timeout_ms=int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "40")),
+        db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
     )
 
 
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import cache
+from app.core.response import success
+
+NO_CACHE = "no-cache"
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    content: bytes
+    etag: str
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+def public_cache(max_age: int) -> str:
+    return f"public, max-age={max_age}"
+
+
+def make_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {item.strip() for item in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    bare = etag.removeprefix("W/")
+    return any(item.removeprefix("W/") == bare for item in candidates)
+
+
+def encode_json(data: Any) -> EncodedBody:
+    content = orjson.dumps(success(data), default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return EncodedBody(content=content, etag=make_etag(content))
+
+
+def encode_cached(payload: Any) -> EncodedBody:
+    # 只用于缓存里共享的 payload：编码后的字节挂在 payload 所在的缓存条目上，条目失效时一起清除。
+    return cache.derived(payload, encode_json)
+
+
+def conditional_body(request: Request, body: EncodedBody, cache_control: str = NO_CACHE) -> Response:
+    # ETag 由响应体内容计算；客户端带上匹配的 If-None-Match 时只返回 304 头部。
+    headers = {"ETag": body.etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match"), body.etag):
+        return Response(status_code=304, headers=headers)
+    return JSONBytesResponse(content=body.content, headers=headers)
+
+
+def conditional_json(request: Request, data: Any, cache_control: str = NO_CACHE) -> Response:
+    return conditional_body(request, encode_json(data), cache_control)
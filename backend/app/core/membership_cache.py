@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+Entry = dict[Hashable, set[int]]
+
+# LRU 里的占位：该用户的记录数超过 max_members，不缓存集合，调用方回退到按页查询。
+OVERSIZED: Entry = {}
+
+
+# 进程内按用户缓存 id 集合：首次使用时从数据库加载，写操作同步更新，按 LRU 淘汰冷用户。
+# 子类实现 _load；加载时最多读 max_members + 1 条，超出的用户在 LRU 里记为 OVERSIZED，下次不再整表加载。
+class MembershipCache(ABC):
+    def __init__(self, max_users: int = 2000, max_members: int = 20000) -> None:
+        self._users: OrderedDict[int, Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0
+        # 正在加载的用户 -> 加载者数量 / 加载期间的写入次数，只记录加载中的用户。
+        self._loaders: Counter[int] = Counter()
+        self._writes: Counter[int] = Counter()
+        self.max_users = max_users
+        self.max_members = max_members
+
+    @abstractmethod
+    def _load(self, db: Session, user_id: int, limit: int) -> Entry:
+        # 返回该用户的全部集合；总条数超过 limit 时可以提前截断，只要返回的条数大于 limit。
+        ...
+
+    def _entry(self, db: Session, user_id: int) -> Entry | None:
+        if self.max_users <= 0:
+            return None
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                return None if entry is OVERSIZED else entry
+            epoch = self._epoch
+            writes = self._writes[user_id]
+            self._loaders[user_id] += 1
+        try:
+            entry = self._load(db, user_id, self.max_members + 1)
+        finally:
+            with self._lock:
+                # 加载期间该用户有写入（或整体清空）时不落缓存，避免把写入前的旧集合存进去。
+                stale = epoch != self._epoch or writes != self._writes[user_id]
+                self._loaders[user_id] -= 1
+                if not self._loaders[user_id]:
+                    del self._loaders[user_id]
+                    self._writes.pop(user_id, None)
+        oversized = sum(len(ids) for ids in entry.values()) > self.max_members
+        if stale:
+            return None if oversized else entry
+        with self._lock:
+            cached = self._users.setdefault(user_id, OVERSIZED if oversized else entry)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return None if cached is OVERSIZED else cached
+
+    def _touch(self, user_id: int) -> Entry | None:
+        # 调用方持有 _lock：登记一次写入，返回需要同步修改的缓存集合。
+        if user_id in self._loaders:
+            self._writes[user_id] += 1
+        entry = self._users.get(user_id)
+        return None if entry is OVERSIZED else entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._users.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "oversized": sum(1 for entry in self._users.values() if entry is OVERSIZED),
+                "members": sum(len(ids) for entry in self._users.values() for ids in entry.values()),
+            }
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer(ABC):
+    # 写入先进内存缓冲区立即返回，由后台线程按固定间隔批量落库；未启动后台线程时每次写入同步落库。
+    def __init__(self, name: str, interval: float) -> None:
+        self.name = name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._metrics: Counter[str] = Counter()
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch = self._drain()
+            if not batch:
+                return 0
+            started = time.perf_counter()
+            try:
+                self._apply(batch)
+            except Exception:
+                logger.exception("write-behind flush failed for %s, requeueing %d entries", self.name, len(batch))
+                with self._lock:
+                    self._requeue(batch)
+                self._metrics["failures"] += 1
+                return 0
+            self._last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self._max_flush_ms = max(self._max_flush_ms, self._last_flush_ms)
+            self._metrics["flushes"] += 1
+            self._metrics["flushed"] += len(batch)
+            return len(batch)
+
+    def _after_add(self) -> None:
+        if not self.running:
+            self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            pending = self._pending_count()
+        return {
+            "pending": pending,
+            "flushes": self._metrics["flushes"],
+            "flushed": self._metrics["flushed"],
+            "failures": self._metrics["failures"],
+            "last_flush_ms": self._last_flush_ms,
+            "max_flush_ms": self._max_flush_ms,
+        }
+
+    @abstractmethod
+    def _drain(self) -> Any:
+        ...
+
+    @abstractmethod
+    def _requeue(self, batch: Any) -> None:
+        ...
+
+    @abstractmethod
+    def _apply(self, batch: Any) -> None:
+        ...
+
+    @abstractmethod
+    def _pending_count(self) -> int:
+        ...
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.db.session import SQLITE_PROFILES
+
+
+def database_path() -> Path:
+    path = settings.database_url.removeprefix("sqlite:///")
+    return (settings.backend_dir / path).resolve() if not Path(path).is_absolute() else Path(path)
+
+
+def percentile(values: list[float], ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * ratio))], 2)
+
+
+def run_worker(seconds: float, threads: int, write_ratio: float) -> dict[str, Any]:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    latencies: dict[str, list[float]] = {"read": [], "write": []}
+    errors = 0
+    lock = threading.Lock()
+
+    with TestClient(app) as client:
+        poem_ids = [item["id"] for item in client.get("/api/v1/poems", params={"page_size": 50}).json()["data"]["items"]]
+        topic_ids = [item["id"] for item in client.get("/api/v1/square/feed", params={"page_size": 20}).json()["data"]["items"]]
+
+        def login(index: int) -> dict[str, str]:
+            response = client.post("/api/v1/auth/wx-login", json={"code": f"bench-{os.getpid()}-{index}", "profile": {"nickname": "压测"}})
+            return {"Authorization": f"Bearer {response.json()['data']['token']}"}
+
+        def loop(index: int, deadline: float) -> None:
+            nonlocal errors
+            headers = login(index)
+            rng = random.Random(index)
+            while time.perf_counter() < deadline:
+                kind = "write" if rng.random() < write_ratio else "read"
+                started = time.perf_counter()
+                if kind == "read":
+                    if rng.random() < 0.5:
+                        response = client.get("/api/v1/square/feed", params={"page": rng.randint(1, 3)}, headers=headers)
+                    else:
+                        response = client.get("/api/v1/favorites", headers=headers)
+                elif rng.random() < 0.5:
+                    poem_id = rng.choice(poem_ids)
+                    response = client.post(f"/api/v1/favorites/{poem_id}", headers=headers)
+                    client.delete(f"/api/v1/favorites/{poem_id}", headers=headers)
+                else:
+                    response = client.post(f"/api/v1/square/feed/{rng.choice(topic_ids)}/comments", json={"content": "压测评论"}, headers=headers)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    if response.status_code != 200:
+                        errors += 1
+                    latencies[kind].append(elapsed)
+
+        deadline = time.perf_counter() + seconds
+        workers = [threading.Thread(target=loop, args=(index, deadline)) for index in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    return {
+        "reads_per_sec": round(len(latencies["read"]) / seconds, 1),
+        "writes_per_sec": round(len(latencies["write"]) / seconds, 1),
+        "read_p95_ms": percentile(latencies["read"], 0.95),
+        "write_p95_ms": percentile(latencies["write"], 0.95),
+        "errors": errors,
+    }
+
+
+def run_profile(profile: str, seconds: float, threads: int, write_ratio: float) -> dict[str, Any]:
+    # 每个档位在独立进程里跑，使用当前库的一份拷贝，避免档位之间互相影响或改动开发库。
+    with tempfile.TemporaryDirectory() as tmp:
+        target = Path(tmp) / "bench.db"
+        with sqlite3.connect(database_path()) as source, sqlite3.connect(target) as copy:
+            source.backup(copy)
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{target}",
+            "SQLITE_PROFILE": profile,
+            "CACHE_WARMUP": "off",
+        }
+        command = [sys.executable, "-m", "app.db.benchmark", "--worker", "--seconds", str(seconds), "--threads", str(threads), "--write-ratio", str(write_ratio)]
+        output = subprocess.run(command, cwd=settings.backend_dir, env=env, check=True, capture_output=True, text=True).stdout
+    return {"profile": profile, **json.loads(output.strip().splitlines()[-1])}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare API read/write throughput under each SQLite profile.")
+    parser.add_argument("--profiles", nargs="+", default=list(SQLITE_PROFILES), choices=list(SQLITE_PROFILES))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.seconds, args.threads, args.write_ratio)))
+        return
+
+    columns = ("profile", "reads_per_sec", "writes_per_sec", "read_p95_ms", "write_p95_ms", "errors")
+    print(" | ".join(columns))
+    for profile in args.profiles:
+        result = run_profile(profile, args.seconds, args.threads, args.write_ratio)
+        print(" | ".join(str(result[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,7 +15,8 @@ from app.core.config import settings
 from app.db import models
 from app.db.models import Base
 from app.db.session import SessionLocal, engine
-from app.utils.json_util import dump_json_list
+from app.services.poem_totals import recompute as recompute_poem_totals
+from app.services.user_stats import recompute as recompute_user_stats
 
 
 TANG_URL = "https://raw.githubusercontent.com/chinese-poetry/chinese-poetry/master/%E5%85%A8%E5%94%90%E8%AF%97/%E5%94%90%E8%AF%97%E4%B8%89%E7%99%BE%E9%A6%96.json"
@@ -43,6 +44,9 @@ CONTENT_TABLES = [
     models.BrowseHistory.__table__,
     models.PoemName.__table__,
     models.Category.__table__,
+    models.PoemStats.__table__,
+    models.PoemTotals.__table__,
+    models.PoemTag.__table__,
     models.Poem.__table__,
 ]
 
@@ -791,16 +795,22 @@ def import_rows(rows: list[dict[str, Any]]) -> None:
                 author=row["author"],
                 content=row["content"],
                 recommend_sentence=row["recommend_sentence"],
-                tags=dump_json_list(row["tags"]),
-                like_count=row["like_count"],
-                favorite_count=row["favorite_count"],
-                share_count=row["share_count"],
+                tags=row["tags"],
+                stats=[
+                    models.PoemStats(
+                        shard=0,
+                        like_count=row["like_count"],
+                        favorite_count=row["favorite_count"],
+                        share_count=row["share_count"],
+                    )
+                ],
             )
             poems.append(poem)
             db.add(poem)
         db.flush()
 
         db.add_all([models.PoemName(name=poem.title) for poem in poems])
+        recompute_poem_totals(db)
 
         categories = [
             models.Category(name=name, type=type_, sort_order=sort_order)
@@ -819,6 +829,9 @@ def import_rows(rows: list[dict[str, Any]]) -> None:
                 if category is not None:
                     db.add(models.PoemCategory(poem_id=poem.id, category_id=category.id))
 
+        # 重建内容表会清空收藏，用户统计随之从源表重算。
+        db.flush()
+        recompute_user_stats(db)
         db.commit()
 
 
@@ -840,7 +853,7 @@ def main() -> None:
 
     reset_content_schema()
     import_rows(rows)
-    for prefix in ["home:data:", "poem:detail:", "category:list", "feihualing:keywords"]:
+    for prefix in ["home:data:", "poem:detail:", "poem:list:", "category:", "feihualing:keywords"]:
         cache.clear_prefix(prefix)
 
     print(
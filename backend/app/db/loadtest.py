@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import anyio
+from sqlalchemy import select
+
+from app.core.cache import cache
+from app.db import models
+from app.db.benchmark import percentile
+from app.db.session import AsyncReadSessionLocal, ReadSessionLocal, async_engine, async_read_engine
+from app.services import feihualing_service, poem_service, square_service
+
+
+def sync_operations(poem_ids: list[int], room_id: int) -> list[Callable[[Any, random.Random], Any]]:
+    return [
+        lambda db, rng: poem_service.home_data(db, None),
+        lambda db, rng: poem_service.get_poem_detail(db, rng.choice(poem_ids), None),
+        lambda db, rng: poem_service.list_poems(db, None, rng.randint(1, 5), 10),
+        lambda db, rng: square_service.list_feed(db, None, rng.randint(1, 3), 10),
+        lambda db, rng: feihualing_service.get_room(db, room_id),
+    ]
+
+
+def async_operations(poem_ids: list[int], room_id: int) -> list[Callable[[Any, random.Random], Awaitable[Any]]]:
+    return [
+        lambda db, rng: poem_service.home_data_async(db, None),
+        lambda db, rng: poem_service.get_poem_detail_async(db, rng.choice(poem_ids), None),
+        lambda db, rng: poem_service.list_poems_async(db, None, rng.randint(1, 5), 10),
+        lambda db, rng: square_service.list_feed_async(db, None, rng.randint(1, 3), 10),
+        lambda db, rng: feihualing_service.get_room_async(db, room_id),
+    ]
+
+
+async def run_path(path: str, call: Callable[[int], Awaitable[None]], concurrency: int, total: int) -> dict[str, Any]:
+    cache.clear_prefix("")
+    latencies: list[float] = []
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        for index in counter:
+            started = time.perf_counter()
+            await call(index)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "req_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+    }
+
+
+async def main(concurrency: int, total: int) -> None:
+    with ReadSessionLocal() as db:
+        poem_ids = db.scalars(select(models.Poem.id).limit(200)).all()
+        room_id = db.scalar(select(models.FeihualingRoom.id).limit(1))
+    sync_ops = sync_operations(poem_ids, room_id)
+    async_ops = async_operations(poem_ids, room_id)
+
+    # 同步路径模拟 def 路由：每次调用占用 anyio 默认线程池（40 个令牌）中的一个线程。
+    def call_sync(index: int) -> None:
+        rng = random.Random(index)
+        with ReadSessionLocal() as db:
+            sync_ops[index % len(sync_ops)](db, rng)
+
+    async def via_threadpool(index: int) -> None:
+        await anyio.to_thread.run_sync(call_sync, index)
+
+    async def via_async(index: int) -> None:
+        rng = random.Random(index)
+        async with AsyncReadSessionLocal() as db:
+            await async_ops[index % len(async_ops)](db, rng)
+
+    columns = ("path", "requests", "req_per_sec", "p50_ms", "p95_ms")
+    print(" | ".join(columns))
+    for path, call in (("sync", via_threadpool), ("async", via_async)):
+        result = await run_path(path, call, concurrency, total)
+        print(" | ".join(str(result[column]) for column in columns))
+    await async_read_engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the sync (threadpool) and async read paths under concurrent load.")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests))
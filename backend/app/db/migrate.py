@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from sqlalchemy import delete, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db import models
+from app.db.models import Base
+from app.services.poem_totals import recompute as recompute_poem_totals
+from app.services.trending import rebuild_hot_scores
+from app.services.user_stats import recompute as recompute_user_stats
+
+POEM_COUNTER_COLUMNS = ("like_count", "favorite_count", "share_count")
+
+# 已被复合索引（或唯一约束）最左前缀覆盖的单列索引。
+SUPERSEDED_INDEXES = (
+    "ix_favorites_user_id",
+    "ix_browse_history_user_id",
+    "ix_square_topics_user_id",
+    "ix_square_comments_topic_id",
+    "ix_square_reactions_user_id",
+    "ix_feihualing_records_user_id",
+    "ix_feihualing_room_messages_room_id",
+    "ix_user_follows_user_id",
+    "ix_user_follows_target_user_id",
+)
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    # create_all 不会给已存在的表补索引，这里按模型定义补齐。
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def drop_superseded_indexes(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for name in SUPERSEDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def move_poem_counters(engine: Engine) -> None:
+    # 旧库的计数列在 poems 宽表上：迁入 poem_stats 的 0 号分片后删除旧列。
+    columns = {column["name"] for column in inspect(engine).get_columns("poems")}
+    legacy = [name for name in POEM_COUNTER_COLUMNS if name in columns]
+    if not legacy:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO poem_stats (poem_id, shard, like_count, favorite_count, share_count) "
+                f"SELECT id, 0, {', '.join(name if name in legacy else '0' for name in POEM_COUNTER_COLUMNS)} FROM poems "
+                "WHERE id NOT IN (SELECT poem_id FROM poem_stats)"
+            )
+        )
+        for name in legacy:
+            conn.execute(text(f"ALTER TABLE poems DROP COLUMN {name}"))
+
+
+def move_poem_tags(engine: Engine) -> None:
+    # 旧库的标签是 poems.tags 上的 JSON 文本：展开到 poem_tags 后删除旧列。
+    columns = {column["name"] for column in inspect(engine).get_columns("poems")}
+    if "tags" not in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO poem_tags (poem_id, tag, position) "
+                "SELECT poems.id, tag.value, tag.key FROM poems, json_each(poems.tags) AS tag "
+                "WHERE json_valid(poems.tags) AND json_type(poems.tags) = 'array' AND tag.type = 'text'"
+            )
+        )
+        conn.execute(text("ALTER TABLE poems DROP COLUMN tags"))
+
+
+def add_topic_comment_count(engine: Engine) -> None:
+    # 话题评论数改为冗余计数列：旧库补列后按现有评论回填一次。
+    columns = {column["name"] for column in inspect(engine).get_columns("square_topics")}
+    if "comment_count" in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE square_topics ADD COLUMN comment_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(
+            text("UPDATE square_topics SET comment_count = (SELECT count(*) FROM square_comments WHERE square_comments.topic_id = square_topics.id)")
+        )
+
+
+def add_topic_hot_score(engine: Engine) -> None:
+    columns = {column["name"] for column in inspect(engine).get_columns("square_topics")}
+    if "hot_score" in columns:
+        return
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE square_topics ADD COLUMN hot_score FLOAT NOT NULL DEFAULT 0"))
+        rebuild_hot_scores(conn)
+
+
+def fill_feed_inbox(engine: Engine) -> None:
+    # 关注流收件箱为空而已有关注关系时（旧库首次升级），按每人最近的话题补齐一次。
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT 1 FROM feed_inbox LIMIT 1")).first() is not None:
+            return
+        conn.execute(
+            text(
+                "INSERT OR IGNORE INTO feed_inbox (user_id, topic_id, author_id, created_at) "
+                "SELECT user_id, topic_id, author_id, created_at FROM ("
+                "SELECT f.user_id, t.id AS topic_id, t.user_id AS author_id, t.created_at, "
+                "row_number() OVER (PARTITION BY f.user_id ORDER BY t.created_at DESC, t.id DESC) AS position "
+                "FROM user_follows AS f JOIN square_topics AS t ON t.user_id = f.target_user_id"
+                ") WHERE :keep <= 0 OR position <= :keep"
+            ),
+            {"keep": settings.feed_inbox_max_per_user},
+        )
+
+
+def fill_user_stats(engine: Engine) -> None:
+    # user_stats 为空而已有用户时（旧库首次升级），从源表完整计算一次。
+    with Session(engine) as db:
+        if db.scalar(select(models.UserStats.user_id).limit(1)) is not None:
+            return
+        if db.scalar(select(models.User.id).limit(1)) is None:
+            return
+        recompute_user_stats(db)
+        db.commit()
+
+
+def fill_poem_totals(engine: Engine) -> None:
+    # poem_totals 为空而已有诗词时（旧库首次升级），从 poem_stats 汇总一次。
+    with engine.begin() as conn:
+        if conn.execute(select(models.PoemTotals.poem_id).limit(1)).first() is not None:
+            return
+        if conn.execute(select(models.Poem.id).limit(1)).first() is None:
+            return
+        recompute_poem_totals(conn)
+
+
+def drop_orphan_poem_counters(engine: Engine) -> None:
+    # 早期版本在删除诗词后仍可能落库计数增量，留下指向已删除诗词的分片和汇总行，新诗词复用 id 时会主键冲突。
+    with engine.begin() as conn:
+        for model in (models.PoemStats, models.PoemTotals):
+            conn.execute(delete(model).where(model.poem_id.not_in(select(models.Poem.id))))
+
+
+def upgrade_schema(engine: Engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    move_poem_counters(engine)
+    drop_orphan_poem_counters(engine)
+    fill_poem_totals(engine)
+    move_poem_tags(engine)
+    add_topic_comment_count(engine)
+    add_topic_hot_score(engine)
+    fill_feed_inbox(engine)
+    fill_user_stats(engine)
+    create_missing_indexes(engine)
+    drop_superseded_indexes(engine)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -41,12 +41,71 @@ class Poem(Base, TimestampMixin):
     author = Column(String(80), index=True, nullable=False)
     content = Column(Text, nullable=False)
     recommend_sentence = Column(Text, default="", nullable=False)
-    tags = Column(Text, default="[]", nullable=False)
+
+    stats = relationship("PoemStats", lazy="selectin", cascade="all, delete-orphan")
+    tag_rows = relationship("PoemTag", lazy="selectin", cascade="all, delete-orphan")
+
+    # 标签保存在 poem_tags 中，按 position 保持原有顺序；赋值时去重后重建关联行。
+    @property
+    def tags(self) -> list[str]:
+        return [row.tag for row in sorted(self.tag_rows, key=lambda row: row.position)]
+
+    @tags.setter
+    def tags(self, value: list[str]) -> None:
+        self.tag_rows = [PoemTag(tag=tag, position=position) for position, tag in enumerate(dict.fromkeys(value or []))]
+
+    # 计数保存在窄表 poem_stats 中（可按 shard 拆成多行），这里汇总各分片。
+    @property
+    def like_count(self) -> int:
+        return max(0, sum(row.like_count for row in self.stats))
+
+    @property
+    def favorite_count(self) -> int:
+        return max(0, sum(row.favorite_count for row in self.stats))
+
+    @property
+    def share_count(self) -> int:
+        return max(0, sum(row.share_count for row in self.stats))
+
+
+class PoemStats(Base):
+    __tablename__ = "poem_stats"
+
+    poem_id = Column(Integer, ForeignKey("poems.id"), primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
     like_count = Column(Integer, default=0, nullable=False)
     favorite_count = Column(Integer, default=0, nullable=False)
     share_count = Column(Integer, default=0, nullable=False)
 
 
+class PoemTotals(Base):
+    # 各分片计数的汇总，只用于热门排序：带降序复合索引，列表页按索引顺序读取，不再临时汇总、排序。
+    __tablename__ = "poem_totals"
+
+    poem_id = Column(Integer, ForeignKey("poems.id"), primary_key=True)
+    like_count = Column(Integer, default=0, nullable=False)
+    favorite_count = Column(Integer, default=0, nullable=False)
+    share_count = Column(Integer, default=0, nullable=False)
+
+
+Index(
+    "ix_poem_totals_hot",
+    PoemTotals.like_count.desc(),
+    PoemTotals.favorite_count.desc(),
+    PoemTotals.share_count.desc(),
+    PoemTotals.poem_id,
+)
+
+
+class PoemTag(Base):
+    __tablename__ = "poem_tags"
+    __table_args__ = (Index("ix_poem_tags_tag", "tag", "poem_id"),)
+
+    poem_id = Column(Integer, ForeignKey("poems.id"), primary_key=True)
+    tag = Column(String(40), primary_key=True)
+    position = Column(Integer, default=0, nullable=False)
+
+
 class PoemName(Base):
     __tablename__ = "poem_names"
 
@@ -56,6 +115,7 @@ class PoemName(Base):
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (Index("ix_categories_sort", "sort_order", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(80), index=True, nullable=False)
@@ -65,7 +125,10 @@ class Category(Base):
 
 class PoemCategory(Base):
     __tablename__ = "poem_categories"
-    __table_args__ = (UniqueConstraint("poem_id", "category_id", name="uq_poem_category"),)
+    __table_args__ = (
+        UniqueConstraint("poem_id", "category_id", name="uq_poem_category"),
+        Index("ix_poem_categories_category", "category_id", "poem_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     poem_id = Column(Integer, ForeignKey("poems.id"), nullable=False)
@@ -74,10 +137,13 @@ class PoemCategory(Base):
 
 class Favorite(Base):
     __tablename__ = "favorites"
-    __table_args__ = (UniqueConstraint("user_id", "poem_id", name="uq_user_poem_favorite"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "poem_id", name="uq_user_poem_favorite"),
+        Index("ix_favorites_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     poem_id = Column(Integer, ForeignKey("poems.id"), index=True, nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
@@ -86,10 +152,13 @@ class Favorite(Base):
 
 class BrowseHistory(Base):
     __tablename__ = "browse_history"
-    __table_args__ = (UniqueConstraint("user_id", "poem_id", name="uq_user_poem_history"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "poem_id", name="uq_user_poem_history"),
+        Index("ix_browse_history_user_viewed", "user_id", "viewed_at"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     poem_id = Column(Integer, ForeignKey("poems.id"), index=True, nullable=False)
     viewed_at = Column(DateTime, default=now, nullable=False)
 
@@ -98,9 +167,14 @@ class BrowseHistory(Base):
 
 class SquareTopic(Base, TimestampMixin):
     __tablename__ = "square_topics"
+    __table_args__ = (
+        Index("ix_square_topics_created", "created_at"),
+        Index("ix_square_topics_user_created", "user_id", "created_at"),
+        Index("ix_square_topics_hot", "hot_score", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(160), nullable=False)
     content = Column(Text, nullable=False)
     badge = Column(String(40), default="随笔", nullable=False)
@@ -109,6 +183,8 @@ class SquareTopic(Base, TimestampMixin):
     like_count = Column(Integer, default=0, nullable=False)
     favorite_count = Column(Integer, default=0, nullable=False)
     share_count = Column(Integer, default=0, nullable=False)
+    comment_count = Column(Integer, default=0, nullable=False)
+    hot_score = Column(Float, default=0.0, nullable=False)
 
     author = relationship("User")
     comments = relationship("SquareComment", cascade="all, delete-orphan")
@@ -116,9 +192,10 @@ class SquareTopic(Base, TimestampMixin):
 
 class SquareComment(Base, TimestampMixin):
     __tablename__ = "square_comments"
+    __table_args__ = (Index("ix_square_comments_topic_created", "topic_id", "created_at"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    topic_id = Column(Integer, ForeignKey("square_topics.id"), index=True, nullable=False)
+    topic_id = Column(Integer, ForeignKey("square_topics.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     content = Column(Text, nullable=False)
     like_count = Column(Integer, default=0, nullable=False)
@@ -129,10 +206,13 @@ class SquareComment(Base, TimestampMixin):
 
 class SquareReaction(Base):
     __tablename__ = "square_reactions"
-    __table_args__ = (UniqueConstraint("user_id", "target_type", "target_id", "reaction_type", name="uq_square_reaction"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "target_type", "target_id", "reaction_type", name="uq_square_reaction"),
+        Index("ix_square_reactions_user_lookup", "user_id", "target_type", "reaction_type", "target_id"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     target_type = Column(String(20), index=True, nullable=False)
     target_id = Column(Integer, index=True, nullable=False)
     reaction_type = Column(String(20), index=True, nullable=False)
@@ -141,9 +221,10 @@ class SquareReaction(Base):
 
 class FeihualingRecord(Base):
     __tablename__ = "feihualing_records"
+    __table_args__ = (Index("ix_feihualing_records_user_created", "user_id", "created_at"),)
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     keyword = Column(String(20), index=True, nullable=False)
     answer = Column(Text, nullable=False)
     is_correct = Column(Boolean, default=False, nullable=False)
@@ -156,6 +237,7 @@ class FeihualingRecord(Base):
 
 class FeihualingRoom(Base, TimestampMixin):
     __tablename__ = "feihualing_rooms"
+    __table_args__ = (Index("ix_feihualing_rooms_created", "created_at"),)
 
     id = Column(Integer, primary_key=True)
     creator_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
@@ -172,9 +254,10 @@ class FeihualingRoom(Base, TimestampMixin):
 
 class FeihualingRoomMessage(Base, TimestampMixin):
     __tablename__ = "feihualing_room_messages"
+    __table_args__ = (Index("ix_feihualing_room_messages_room_created", "room_id", "created_at"),)
 
     id = Column(Integer, primary_key=True)
-    room_id = Column(Integer, ForeignKey("feihualing_rooms.id"), index=True, nullable=False)
+    room_id = Column(Integer, ForeignKey("feihualing_rooms.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
     role = Column(String(20), default="opponent", nullable=False)
     content = Column(Text, nullable=False)
@@ -187,14 +270,47 @@ class FeihualingRoomMessage(Base, TimestampMixin):
 
 class UserFollow(Base):
     __tablename__ = "user_follows"
-    __table_args__ = (UniqueConstraint("user_id", "target_user_id", name="uq_user_follow"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "target_user_id", name="uq_user_follow"),
+        Index("ix_user_follows_user_created", "user_id", "created_at"),
+        Index("ix_user_follows_target_created", "target_user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
-    target_user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    target_user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=now, nullable=False)
 
 
+class UserStats(Base):
+    # 个人中心计数的物化表，由各写入路径在同一事务里增量维护，可用 python -m app.db.repair_stats 从源表重算。
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    topic_count = Column(Integer, default=0, nullable=False)
+    like_count = Column(Integer, default=0, nullable=False)
+    favorite_count = Column(Integer, default=0, nullable=False)
+    following_count = Column(Integer, default=0, nullable=False)
+    follower_count = Column(Integer, default=0, nullable=False)
+
+
+class FeedInbox(Base):
+    # 关注流收件箱：关注的人发帖后写入每个粉丝一行，关注页按 (user_id, created_at) 做一次范围读取。
+    __tablename__ = "feed_inbox"
+    __table_args__ = (
+        UniqueConstraint("user_id", "topic_id", name="uq_feed_inbox_user_topic"),
+        Index("ix_feed_inbox_user_created", "user_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    topic_id = Column(Integer, ForeignKey("square_topics.id"), index=True, nullable=False)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+    topic = relationship("SquareTopic")
+
+
 class Feedback(Base):
     __tablename__ = "feedback"
 
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.user_stats import recompute
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute the user_stats table from the source tables.")
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="only repair these users (repeatable)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        repaired = recompute(db, args.user_ids)
+        db.commit()
+    print(f"Recomputed stats for {repaired} users.")
+
+
+if __name__ == "__main__":
+    main()
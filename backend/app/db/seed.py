@@ -5,6 +5,9 @@ from sqlalchemy.orm import Session
 
 from app.db.author_expansion import AUTHOR_EXPANSION_POEMS
 from app.db import models
+from app.services.poem_totals import recompute as recompute_poem_totals
+from app.services.trending import HOT_WEIGHTS, hot_score_for
+from app.services.user_stats import recompute as recompute_user_stats
 from app.utils.json_util import dump_json_list
 
 
@@ -237,10 +240,11 @@ def seed_data(db: Session) -> None:
 
     poems = []
     for item in POEMS:
-        poem = models.Poem(**{key: value for key, value in item.items() if key != "tags"}, tags=dump_json_list(item["tags"]))
+        poem = models.Poem(**item)
         poems.append(poem)
     db.add_all(poems)
     db.flush()
+    recompute_poem_totals(db)
     db.add_all([models.PoemName(name=poem.title) for poem in poems])
 
     categories = [models.Category(name=name, type=type_, sort_order=sort_order) for name, type_, sort_order in CATEGORIES]
@@ -267,7 +271,9 @@ def seed_data(db: Session) -> None:
         images=dump_json_list(["/assets/images/square-01.svg", "/assets/images/square-02.svg"]),
         like_count=12,
         favorite_count=3,
+        comment_count=1,
     )
+    topic.hot_score = hot_score_for({field: getattr(topic, field) for field in HOT_WEIGHTS}, 0)
     db.add(topic)
     db.flush()
     db.add(models.SquareComment(topic_id=topic.id, user_id=users[2].id, content="这句配山路很合适。", like_count=2))
@@ -296,4 +302,7 @@ def seed_data(db: Session) -> None:
     )
 
     db.add(models.UserFollow(user_id=users[0].id, target_user_id=users[1].id))
+    db.add(models.FeedInbox(user_id=users[0].id, topic_id=topic.id, author_id=users[1].id, created_at=topic.created_at))
+    db.flush()
+    recompute_user_stats(db)
     db.commit()
@@ -1,15 +1,109 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, TypeVar
 
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
 
-connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-engine = create_engine(settings.database_url, connect_args=connect_args, future=True)
+T = TypeVar("T")
+
+# 每个连接建立时执行的 PRAGMA。performance 适合单机部署：WAL 允许读写并发，synchronous=NORMAL 在 WAL 下只在检查点时 fsync；
+# safe 保留回滚日志和 FULL 同步；default 不做任何设置，用于基准对比。
+SQLITE_PROFILES: dict[str, dict[str, Any]] = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+    },
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+    },
+    "default": {},
+}
+REPORTED_PRAGMAS = ("journal_mode", "synchronous", "temp_store", "mmap_size", "cache_size", "busy_timeout")
+
+
+def sqlite_pragmas(profile: str) -> dict[str, Any]:
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"unknown SQLITE_PROFILE: {profile}")
+    return SQLITE_PROFILES[profile]
+
+
+def _engine_options(database_url: str) -> dict[str, Any]:
+    if not database_url.startswith("sqlite"):
+        return {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+    options: dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if ":memory:" not in database_url:
+        # 连接池与 FastAPI 同步路由的线程池（默认 40 个线程）对齐，避免请求线程排队等连接。
+        options.update(pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow)
+    return options
+
+
+def _install_pragmas(engine: Engine, profile: str, read_only: bool) -> None:
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(profile)
+    if read_only:
+        # 只读连接不能切换日志模式，WAL 由写引擎设置；query_only 兜底拦截误写。
+        pragmas = {name: value for name, value in pragmas.items() if name != "journal_mode"} | {"query_only": "ON"}
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, _record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def make_engine(database_url: str, profile: str = settings.sqlite_profile, read_only: bool = False) -> Engine:
+    engine = create_engine(database_url, future=True, **_engine_options(database_url))
+    _install_pragmas(engine, profile, read_only)
+    return engine
+
+
+def async_url(database_url: str) -> str:
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    return database_url
+
+
+def make_async_engine(database_url: str, profile: str = settings.sqlite_profile, read_only: bool = False) -> AsyncEngine:
+    engine = create_async_engine(async_url(database_url), **_engine_options(database_url))
+    _install_pragmas(engine.sync_engine, profile, read_only)
+    return engine
+
+
+def pragma_report(engine: Engine) -> dict[str, Any]:
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in REPORTED_PRAGMAS}
+
+
+engine = make_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+read_engine = make_engine(settings.read_database_url, read_only=True) if settings.read_database_url else engine
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, future=True)
+
+# 热点读接口的异步路径：aiosqlite 在各自的连接线程里执行 SQL，协程等待期间不占用路由线程池。
+async_engine = make_async_engine(settings.async_database_url or settings.database_url)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+if settings.async_read_database_url or settings.read_database_url:
+    async_read_engine = make_async_engine(settings.async_read_database_url or settings.read_database_url, read_only=True)
+else:
+    async_read_engine = async_engine
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -18,3 +112,28 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def _reads_primary(request: Request) -> bool:
+    route = request.scope.get("route")
+    return getattr(route, "name", "") in settings.read_db_primary_routes
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    # GET 路由默认走只读引擎，WAL 下读连接不会排在写锁后面；READ_DB_PRIMARY_ROUTES 中列出的路由名仍走主库。
+    db = SessionLocal() if _reads_primary(request) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    factory = AsyncSessionLocal if _reads_primary(request) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def run_in_session(fn: Callable[[Session], T]) -> T:
+    with SessionLocal() as db:
+        return fn(db)
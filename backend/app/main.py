@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
 
@@ -9,18 +11,46 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api_router import api_router
 from app.core.config import settings
 from app.core.exceptions import register_exception_handlers
-from app.db.models import Base
+from app.db.migrate import upgrade_schema
 from app.db.seed import seed_data
-from app.db.session import SessionLocal, engine
+from app.db.session import SessionLocal, async_engine, async_read_engine, engine, pragma_report, run_in_session
+from app.services.counters import counter_buffer
+from app.services.feed_inbox import fanout_buffer
+from app.services.history_buffer import history_buffer
+from app.services.trending import hot_score_decayer
+from app.services.warmup import mark_ready, warm_caches
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    logger.info("sqlite profile %s: %s", settings.sqlite_profile, pragma_report(engine))
     if settings.is_dev:
         with SessionLocal() as db:
             seed_data(db)
+
+    warmup_task = None
+    if settings.cache_warmup == "sync":
+        run_in_session(lambda db: warm_caches(db, settings.cache_warmup_top_poems))
+    elif settings.cache_warmup == "background":
+        warmup_task = asyncio.create_task(asyncio.to_thread(run_in_session, lambda db: warm_caches(db, settings.cache_warmup_top_poems)))
+    else:
+        mark_ready()
+    counter_buffer.start()
+    history_buffer.start()
+    fanout_buffer.start()
+    hot_score_decayer.start()
     yield
+    hot_score_decayer.stop()
+    fanout_buffer.stop()
+    history_buffer.stop()
+    counter_buffer.stop()
+    if warmup_task is not None:
+        await warmup_task
+    await async_read_engine.dispose()
+    await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
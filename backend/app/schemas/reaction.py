@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class ReactionOperation(BaseModel):
+    target_type: Literal["poem", "topic", "comment"]
+    target_id: int
+    reaction_type: Literal["like", "favorite"]
+    active: bool
+
+
+class ReactionSyncRequest(BaseModel):
+    operations: list[ReactionOperation] = Field(min_length=1, max_length=200)
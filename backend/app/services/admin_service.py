@@ -4,7 +4,7 @@ from collections import Counter
 from datetime import datetime, timedelta
 from typing import Any
 
-from sqlalchemy import delete, func, or_, select
+from sqlalchemy import case, delete, func, or_, select, update
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.cache import cache
@@ -18,6 +18,12 @@ from app.schemas.admin import (
     SquareTopicAdminPayload,
     UserAdminPayload,
 )
+from app.services import feed_inbox, poem_totals, user_stats
+from app.services.counters import counter_buffer
+from app.services.history_buffer import history_buffer
+from app.services.poem_service import hot_poems_select
+from app.services.reaction_cache import reaction_cache
+from app.services.trending import HOT_WEIGHTS, hot_score_plus
 from app.utils.json_util import dump_json_list, parse_json_list
 from app.utils.pagination import clamp_page, clamp_page_size, page_dict, paginate_select
 
@@ -49,6 +55,15 @@ def _prune_orphan_poem_names(db: Session) -> None:
             db.delete(poem_name)
 
 
+def _poem_stats(payload: PoemAdminPayload) -> models.PoemStats:
+    return models.PoemStats(
+        shard=0,
+        like_count=payload.like_count,
+        favorite_count=payload.favorite_count,
+        share_count=payload.share_count,
+    )
+
+
 def poem_row(db: Session, poem: models.Poem) -> dict[str, Any]:
     return {
         "id": poem.id,
@@ -57,7 +72,7 @@ def poem_row(db: Session, poem: models.Poem) -> dict[str, Any]:
         "author": poem.author,
         "content": poem.content,
         "recommend_sentence": poem.recommend_sentence,
-        "tags": parse_json_list(poem.tags),
+        "tags": poem.tags,
         "category_ids": _poem_category_ids(db, poem.id),
         "like_count": poem.like_count,
         "favorite_count": poem.favorite_count,
@@ -109,7 +124,7 @@ def topic_row(topic: models.SquareTopic) -> dict[str, Any]:
         "like_count": topic.like_count,
         "favorite_count": topic.favorite_count,
         "share_count": topic.share_count,
-        "comment_count": len(topic.comments),
+        "comment_count": topic.comment_count,
         "created_at": _time(topic.created_at),
         "updated_at": _time(topic.updated_at),
     }
@@ -184,11 +199,11 @@ def dashboard(db: Session) -> dict[str, Any]:
         "records": db.scalar(select(func.count()).select_from(models.FeihualingRecord)) or 0,
     }
     hot_poems = db.scalars(
-        select(models.Poem).order_by(models.Poem.like_count.desc(), models.Poem.favorite_count.desc(), models.Poem.id.asc()).limit(8)
+        hot_poems_select().limit(8)
     ).all()
     latest_topics = db.scalars(
         select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments))
+        .options(selectinload(models.SquareTopic.author))
         .order_by(models.SquareTopic.created_at.desc())
         .limit(6)
     ).all()
@@ -240,18 +255,18 @@ def create_poem(db: Session, payload: PoemAdminPayload) -> dict[str, Any]:
         author=payload.author,
         content=payload.content,
         recommend_sentence=payload.recommend_sentence,
-        tags=dump_json_list(payload.tags),
-        like_count=payload.like_count,
-        favorite_count=payload.favorite_count,
-        share_count=payload.share_count,
+        tags=payload.tags,
+        stats=[_poem_stats(payload)],
     )
     db.add(poem)
     db.flush()
+    poem_totals.recompute(db, [poem.id])
     _set_poem_categories(db, poem.id, payload.category_ids)
     _ensure_poem_name(db, payload.title)
     db.commit()
     db.refresh(poem)
     cache.clear_prefix("home:data:")
+    cache.clear_prefix("poem:list:")
     cache.clear_prefix("category:")
     return poem_row(db, poem)
 
@@ -266,10 +281,10 @@ def update_poem(db: Session, poem_id: int, payload: PoemAdminPayload) -> dict[st
     poem.author = payload.author
     poem.content = payload.content
     poem.recommend_sentence = payload.recommend_sentence
-    poem.tags = dump_json_list(payload.tags)
-    poem.like_count = payload.like_count
-    poem.favorite_count = payload.favorite_count
-    poem.share_count = payload.share_count
+    poem.tags = payload.tags
+    poem.stats = [_poem_stats(payload)]
+    db.flush()
+    poem_totals.recompute(db, [poem.id])
     _set_poem_categories(db, poem.id, payload.category_ids)
     _ensure_poem_name(db, payload.title)
     if old_title != payload.title:
@@ -279,6 +294,7 @@ def update_poem(db: Session, poem_id: int, payload: PoemAdminPayload) -> dict[st
     db.refresh(poem)
     cache.clear_prefix("poem:detail:")
     cache.clear_prefix("home:data:")
+    cache.clear_prefix("poem:list:")
     cache.clear_prefix("category:")
     return poem_row(db, poem)
 
@@ -288,15 +304,23 @@ def delete_poem(db: Session, poem_id: int) -> dict[str, Any]:
     if poem is None:
         raise BusinessError("Poem not found", code=40401, status_code=404)
     db.execute(delete(models.PoemCategory).where(models.PoemCategory.poem_id == poem_id))
+    user_stats.subtract_grouped(db, "favorite_count", models.Favorite, models.Favorite.poem_id == poem_id)
     db.execute(delete(models.Favorite).where(models.Favorite.poem_id == poem_id))
+    history_buffer.discard_poem(poem_id)
+    counter_buffer.discard(models.Poem, poem_id)
     db.execute(delete(models.BrowseHistory).where(models.BrowseHistory.poem_id == poem_id))
-    db.execute(delete(models.SquareReaction).where(models.SquareReaction.target_type == "poem", models.SquareReaction.target_id == poem_id))
+    poem_reactions = (models.SquareReaction.target_type == "poem", models.SquareReaction.target_id == poem_id)
+    user_stats.subtract_grouped(db, "like_count", models.SquareReaction, *poem_reactions, models.SquareReaction.reaction_type == "like")
+    db.execute(delete(models.SquareReaction).where(*poem_reactions))
+    poem_totals.remove(db, poem_id)
     db.delete(poem)
     db.flush()
     _prune_orphan_poem_names(db)
     db.commit()
+    reaction_cache.clear()
     cache.clear_prefix("poem:detail:")
     cache.clear_prefix("home:data:")
+    cache.clear_prefix("poem:list:")
     cache.clear_prefix("category:")
     return {"deleted": True, "id": poem_id}
 
@@ -368,7 +392,7 @@ def update_user(db: Session, user_id: int, payload: UserAdminPayload) -> dict[st
 def list_topics(db: Session, page: int, page_size: int, keyword: str = "", user_id: int | None = None) -> dict[str, Any]:
     stmt = (
         select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments))
+        .options(selectinload(models.SquareTopic.author))
         .order_by(models.SquareTopic.created_at.desc(), models.SquareTopic.id.desc())
     )
     if keyword:
@@ -393,9 +417,10 @@ def update_topic(db: Session, topic_id: int, payload: SquareTopicAdminPayload) -
     if data.get("images") is not None:
         topic.images = dump_json_list(data["images"])
     db.commit()
+    cache.clear_prefix("square:feed:")
     topic = db.scalar(
         select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments))
+        .options(selectinload(models.SquareTopic.author))
         .where(models.SquareTopic.id == topic_id)
     )
     return topic_row(topic)
@@ -407,10 +432,18 @@ def delete_topic(db: Session, topic_id: int) -> dict[str, Any]:
         raise BusinessError("Topic not found", code=40404, status_code=404)
     comment_ids = list(db.scalars(select(models.SquareComment.id).where(models.SquareComment.topic_id == topic_id)).all())
     if comment_ids:
-        db.execute(delete(models.SquareReaction).where(models.SquareReaction.target_type == "comment", models.SquareReaction.target_id.in_(comment_ids)))
-    db.execute(delete(models.SquareReaction).where(models.SquareReaction.target_type == "topic", models.SquareReaction.target_id == topic_id))
+        comment_reactions = (models.SquareReaction.target_type == "comment", models.SquareReaction.target_id.in_(comment_ids))
+        user_stats.subtract_grouped(db, "like_count", models.SquareReaction, *comment_reactions, models.SquareReaction.reaction_type == "like")
+        db.execute(delete(models.SquareReaction).where(*comment_reactions))
+    topic_reactions = (models.SquareReaction.target_type == "topic", models.SquareReaction.target_id == topic_id)
+    user_stats.subtract_grouped(db, "like_count", models.SquareReaction, *topic_reactions, models.SquareReaction.reaction_type == "like")
+    db.execute(delete(models.SquareReaction).where(*topic_reactions))
+    user_stats.bump(db, topic.user_id, topic_count=-1)
+    feed_inbox.remove_topic(db, topic_id)
     db.delete(topic)
     db.commit()
+    cache.clear_prefix("square:feed:")
+    reaction_cache.clear()
     return {"deleted": True, "id": topic_id}
 
 
@@ -432,9 +465,21 @@ def delete_comment(db: Session, comment_id: int) -> dict[str, Any]:
     comment = db.get(models.SquareComment, comment_id)
     if comment is None:
         raise BusinessError("Comment not found", code=40405, status_code=404)
-    db.execute(delete(models.SquareReaction).where(models.SquareReaction.target_type == "comment", models.SquareReaction.target_id == comment_id))
+    comment_reactions = (models.SquareReaction.target_type == "comment", models.SquareReaction.target_id == comment_id)
+    user_stats.subtract_grouped(db, "like_count", models.SquareReaction, *comment_reactions, models.SquareReaction.reaction_type == "like")
+    db.execute(delete(models.SquareReaction).where(*comment_reactions))
+    db.execute(
+        update(models.SquareTopic)
+        .where(models.SquareTopic.id == comment.topic_id)
+        .values(
+            comment_count=case((models.SquareTopic.comment_count > 0, models.SquareTopic.comment_count - 1), else_=0),
+            hot_score=hot_score_plus(-HOT_WEIGHTS["comment_count"]),
+        )
+    )
     db.delete(comment)
     db.commit()
+    cache.clear_prefix("square:feed:")
+    reaction_cache.clear()
     return {"deleted": True, "id": comment_id}
 
 
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+
+from sqlalchemy import bindparam, case, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.core.write_behind import WriteBehindBuffer
+from app.db import models
+from app.db.session import engine
+from app.services import poem_totals
+from app.services.trending import HOT_WEIGHTS, hot_score_plus
+
+CounterKey = tuple[str, int, str]
+
+COUNTER_TABLES = {
+    models.SquareTopic.__tablename__: models.SquareTopic.__table__,
+    models.SquareComment.__tablename__: models.SquareComment.__table__,
+}
+
+
+class CounterBuffer(WriteBehindBuffer):
+    # 点赞、收藏、分享计数先累加到内存，再批量执行 UPDATE ... SET x = x + :delta，避免每次点击一个写事务和并发丢失更新。
+    def __init__(self, interval: float) -> None:
+        super().__init__("counters", interval)
+        self._pending: dict[CounterKey, int] = defaultdict(int)
+
+    def add(self, model: type[models.Base], row_id: int, field: str, delta: int = 1) -> None:
+        with self._lock:
+            self._pending[(model.__tablename__, row_id, field)] += delta
+        self._after_add()
+
+    def discard(self, model: type[models.Base], row_id: int) -> None:
+        # 删除行之前调用：丢弃尚未落库的增量，避免落库时写到已删除的行上。
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == model.__tablename__ and key[1] == row_id]:
+                del self._pending[key]
+
+    def current(self, row: models.Base, field: str) -> int:
+        with self._lock:
+            delta = self._pending.get((row.__tablename__, row.id, field), 0)
+        return max(0, getattr(row, field) + delta)
+
+    def _drain(self) -> dict[CounterKey, int]:
+        batch = {key: delta for key, delta in self._pending.items() if delta}
+        self._pending.clear()
+        return batch
+
+    def _requeue(self, batch: dict[CounterKey, int]) -> None:
+        for key, delta in batch.items():
+            self._pending[key] += delta
+
+    def _pending_count(self) -> int:
+        return len(self._pending)
+
+    def _apply(self, batch: dict[CounterKey, int]) -> None:
+        with engine.begin() as conn:
+            apply_counter_deltas(conn, batch)
+        invalidate_counter_caches(batch)
+
+
+def apply_counter_deltas(conn: Connection, batch: dict[CounterKey, int]) -> None:
+    grouped: dict[tuple[str, str], list[dict[str, int]]] = defaultdict(list)
+    for (table, row_id, field), delta in batch.items():
+        if delta:
+            grouped[(table, field)].append({"row_id": row_id, "delta": delta})
+    for (table_name, field), params in grouped.items():
+        if table_name == models.Poem.__tablename__:
+            _apply_poem_stats(conn, field, params)
+            continue
+        table = COUNTER_TABLES[table_name]
+        column = table.c[field]
+        values = {field: case((column + bindparam("delta") < 0, 0), else_=column + bindparam("delta"))}
+        if table_name == models.SquareTopic.__tablename__ and field in HOT_WEIGHTS:
+            # 话题热度随计数在同一条 UPDATE 里增量累加。
+            values["hot_score"] = hot_score_plus(bindparam("hot_delta"))
+            params = [{**item, "hot_delta": item["delta"] * HOT_WEIGHTS[field]} for item in params]
+        stmt = table.update().where(table.c.id == bindparam("row_id")).values(values)
+        conn.execute(stmt, params)
+
+
+def invalidate_counter_caches(batch: dict[CounterKey, int]) -> None:
+    poem_ids = {row_id for table, row_id, _ in batch if table == models.Poem.__tablename__}
+    for poem_id in poem_ids:
+        cache.delete(f"poem:detail:{poem_id}")
+    if poem_ids:
+        cache.clear_prefix("home:data:")
+
+
+def _apply_poem_stats(conn: Connection, field: str, params: list[dict[str, int]]) -> None:
+    # 诗词计数写入 poem_stats 的随机分片；分片允许为负，读取时汇总后再截断为 0。
+    # 通过 INSERT ... SELECT FROM poems 只给仍存在的诗词写入，落库前已被删除的诗词不会留下孤儿行。
+    table = models.PoemStats.__table__
+    rows = select(models.Poem.id, bindparam("shard"), bindparam("delta")).where(models.Poem.id == bindparam("row_id"))
+    stmt = sqlite_insert(table).from_select(["poem_id", "shard", field], rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.poem_id, table.c.shard],
+        set_={field: table.c[field] + stmt.excluded[field]},
+    )
+    shards = settings.poem_stats_shards
+    conn.execute(stmt, [{**item, "shard": random.randrange(shards)} for item in params])
+    poem_totals.apply_deltas(conn, field, params)
+
+
+counter_buffer = CounterBuffer(settings.counter_flush_interval_ms / 1000)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.write_behind import WriteBehindBuffer
+from app.db import models
+from app.db.session import engine
+
+# topic_id -> (author_id, created_at)
+FanoutBatch = dict[int, tuple[int, datetime]]
+
+INBOX_COLUMNS = ("user_id", "topic_id", "author_id", "created_at")
+
+
+class FeedFanoutBuffer(WriteBehindBuffer):
+    # 发帖只登记待分发的话题，由后台线程用 INSERT ... SELECT 批量写进每个粉丝的 feed_inbox，发帖请求不随粉丝数变慢。
+    def __init__(self, interval: float, max_per_user: int) -> None:
+        super().__init__("fanout", interval)
+        self.max_per_user = max_per_user
+        self._pending: FanoutBatch = {}
+
+    def add(self, topic: models.SquareTopic) -> None:
+        with self._lock:
+            self._pending[topic.id] = (topic.user_id, topic.created_at)
+        self._after_add()
+
+    def discard_topic(self, topic_id: int) -> None:
+        with self._lock:
+            self._pending.pop(topic_id, None)
+
+    def _drain(self) -> FanoutBatch:
+        batch = self._pending
+        self._pending = {}
+        return batch
+
+    def _requeue(self, batch: FanoutBatch) -> None:
+        for topic_id, item in batch.items():
+            self._pending.setdefault(topic_id, item)
+
+    def _pending_count(self) -> int:
+        return len(self._pending)
+
+    def _apply(self, batch: FanoutBatch) -> None:
+        author_ids = {author_id for author_id, _ in batch.values()}
+        with engine.begin() as conn:
+            for topic_id, (author_id, created_at) in batch.items():
+                conn.execute(fanout_stmt(topic_id, author_id, created_at))
+            if self.max_per_user > 0:
+                conn.execute(trim_inbox_stmt(follower_ids_select(author_ids), self.max_per_user))
+
+
+def follower_ids_select(author_ids: Iterable[int]) -> Any:
+    return select(models.UserFollow.user_id).where(models.UserFollow.target_user_id.in_(set(author_ids)))
+
+
+def fanout_stmt(topic_id: int, author_id: int, created_at: datetime) -> Any:
+    table = models.FeedInbox.__table__
+    rows = select(
+        models.UserFollow.user_id,
+        literal(topic_id),
+        literal(author_id),
+        literal(created_at, table.c.created_at.type),
+    ).where(models.UserFollow.target_user_id == author_id)
+    return insert(table).from_select(INBOX_COLUMNS, rows).prefix_with("OR IGNORE")
+
+
+def trim_inbox_stmt(user_ids: Any, keep: int) -> Any:
+    table = models.FeedInbox.__table__
+    ranked = (
+        select(
+            table.c.id,
+            func.row_number().over(partition_by=table.c.user_id, order_by=(table.c.created_at.desc(), table.c.id.desc())).label("position"),
+        )
+        .where(table.c.user_id.in_(user_ids))
+        .subquery()
+    )
+    return delete(table).where(table.c.id.in_(select(ranked.c.id).where(ranked.c.position > keep)))
+
+
+def add_author(db: Session, user_id: int, author_id: int, keep: int = settings.feed_inbox_max_per_user) -> None:
+    # 新关注时把对方最近的话题补进收件箱，关注页立刻能看到内容。
+    table = models.FeedInbox.__table__
+    recent = (
+        select(literal(user_id), models.SquareTopic.id, models.SquareTopic.user_id, models.SquareTopic.created_at)
+        .where(models.SquareTopic.user_id == author_id)
+        .order_by(models.SquareTopic.created_at.desc())
+        .limit(keep if keep > 0 else None)
+    )
+    db.execute(insert(table).from_select(INBOX_COLUMNS, recent).prefix_with("OR IGNORE"))
+    if keep > 0:
+        db.execute(trim_inbox_stmt([user_id], keep))
+
+
+def remove_author(db: Session, user_id: int, author_id: int) -> None:
+    db.execute(delete(models.FeedInbox).where(models.FeedInbox.user_id == user_id, models.FeedInbox.author_id == author_id))
+
+
+def remove_topic(db: Session, topic_id: int) -> None:
+    fanout_buffer.discard_topic(topic_id)
+    db.execute(delete(models.FeedInbox).where(models.FeedInbox.topic_id == topic_id))
+
+
+fanout_buffer = FeedFanoutBuffer(settings.feed_fanout_interval_ms / 1000, settings.feed_inbox_max_per_user)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from collections.abc import Iterable
 
 from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 
 from app.core.cache import cache
@@ -14,13 +15,11 @@ from app.utils.pagination import page_dict, paginate_select
 
 
 def keywords(db: Session) -> dict:
-    cached = cache.get("feihualing:keywords")
-    if cached is not None:
-        return cached
-
-    data = {"items": ["花", "月", "山", "水", "春", "秋", "风", "雪", "人", "江"]}
-    cache.set("feihualing:keywords", data, ttl=1800)
-    return data
+    return cache.get_or_set(
+        "feihualing:keywords",
+        lambda: {"items": ["花", "月", "山", "水", "春", "秋", "风", "雪", "人", "江"]},
+        ttl=1800,
+    )
 
 
 PUNCTUATION = set(" \t\r\n，。！？、；：“”‘’《》（）,.!?;:'\"()[]{}-")
@@ -248,6 +247,10 @@ def get_room(db: Session, room_id: int) -> dict:
     return feihualing_room_item(room)
 
 
+async def get_room_async(db: AsyncSession, room_id: int) -> dict:
+    return await db.run_sync(get_room, room_id)
+
+
 def create_room(db: Session, user: models.User, data: FeihualingRoomCreate) -> dict:
     can_watch = data.can_watch if data.can_watch is not None else data.canWatch
     max_players = data.max_players if data.max_players is not None else data.maxPlayers
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.exceptions import BusinessError
+from app.core.membership_cache import MembershipCache
+from app.db import models
+from app.services import feed_inbox, user_stats
+from app.services.serializers import follow_item
+from app.utils.pagination import decode_cursor, encode_cursor
+
+# direction -> (按哪一列筛选列表主人, 列表里展示的是哪一列的用户)
+DIRECTIONS = {
+    "following": (models.UserFollow.user_id, models.UserFollow.target_user_id),
+    "followers": (models.UserFollow.target_user_id, models.UserFollow.user_id),
+}
+# 判断互相关注时要查的反方向集合。
+REVERSE = {"following": "followers", "followers": "following"}
+
+
+# 按用户缓存关注/粉丝 id 集合，用来给列表页批量判断互相关注；关系数超过 max_members 的用户回退到按页查询。
+class FollowGraphCache(MembershipCache):
+    def _load(self, db: Session, user_id: int, limit: int) -> dict[str, set[int]]:
+        entry: dict[str, set[int]] = {"following": set(), "followers": set()}
+        for direction, (owner, member) in DIRECTIONS.items():
+            entry[direction].update(db.scalars(select(member).where(owner == user_id).limit(limit)).all())
+        return entry
+
+    def members(self, db: Session, user_id: int, direction: str, user_ids: Iterable[int]) -> set[int] | None:
+        entry = self._entry(db, user_id)
+        if entry is None:
+            return None
+        return entry[direction].intersection(user_ids)
+
+    def update(self, user_id: int, target_user_id: int, active: bool) -> None:
+        with self._lock:
+            for owner_id, direction, member_id in ((user_id, "following", target_user_id), (target_user_id, "followers", user_id)):
+                entry = self._touch(owner_id)
+                if entry is None:
+                    continue
+                if active:
+                    entry[direction].add(member_id)
+                else:
+                    entry[direction].discard(member_id)
+
+
+follow_cache = FollowGraphCache(settings.follow_cache_users, settings.follow_cache_max_members)
+
+
+def follow_user(db: Session, user: models.User, target_user_id: int) -> dict:
+    if target_user_id == user.id:
+        raise BusinessError("不能关注自己")
+    if db.get(models.User, target_user_id) is None:
+        raise BusinessError("用户不存在", code=40408, status_code=404)
+    exists = db.scalar(
+        select(models.UserFollow.id).where(models.UserFollow.user_id == user.id, models.UserFollow.target_user_id == target_user_id)
+    )
+    if exists is None:
+        db.add(models.UserFollow(user_id=user.id, target_user_id=target_user_id))
+        feed_inbox.add_author(db, user.id, target_user_id)
+        user_stats.bump(db, user.id, following_count=1)
+        user_stats.bump(db, target_user_id, follower_count=1)
+        db.commit()
+        follow_cache.update(user.id, target_user_id, True)
+    return {"id": target_user_id, "following": True}
+
+
+def unfollow_user(db: Session, user: models.User, target_user_id: int) -> dict:
+    deleted = db.execute(
+        delete(models.UserFollow).where(models.UserFollow.user_id == user.id, models.UserFollow.target_user_id == target_user_id)
+    ).rowcount
+    if deleted:
+        feed_inbox.remove_author(db, user.id, target_user_id)
+        user_stats.bump(db, user.id, following_count=-1)
+        user_stats.bump(db, target_user_id, follower_count=-1)
+    db.commit()
+    if deleted:
+        follow_cache.update(user.id, target_user_id, False)
+    return {"id": target_user_id, "following": False}
+
+
+def _follow_select(user_id: int, direction: str) -> Any:
+    # 一次 join 取出整页用户，按 (user_id|target_user_id, created_at) 复合索引倒序扫描。
+    owner, member = DIRECTIONS[direction]
+    return (
+        select(models.UserFollow, models.User)
+        .join(models.User, models.User.id == member)
+        .where(owner == user_id)
+        .order_by(models.UserFollow.created_at.desc(), models.UserFollow.id.desc())
+    )
+
+
+def mutual_ids(db: Session, user_id: int, direction: str, user_ids: Iterable[int]) -> set[int]:
+    # 关注列表里回关了主人的、粉丝列表里主人也关注了的，都算互相关注。
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    reverse = REVERSE[direction]
+    cached = follow_cache.members(db, user_id, reverse, user_ids)
+    if cached is not None:
+        return cached
+    owner, member = DIRECTIONS[reverse]
+    return set(db.scalars(select(member).where(owner == user_id, member.in_(user_ids))).all())
+
+
+def list_follows(db: Session, user_id: int, direction: str, cursor: str | None, limit: int) -> dict:
+    if db.get(models.User, user_id) is None:
+        raise BusinessError("用户不存在", code=40408, status_code=404)
+    stmt = _follow_select(user_id, direction).limit(limit + 1)
+    if cursor:
+        try:
+            created_at, follow_id = decode_cursor(cursor)
+        except ValueError:
+            raise BusinessError("分页游标无效") from None
+        stmt = stmt.where(tuple_(models.UserFollow.created_at, models.UserFollow.id) < (created_at, follow_id))
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0].created_at, rows[-1][0].id)
+    mutual = mutual_ids(db, user_id, direction, [member.id for _, member in rows])
+    return {
+        "items": [follow_item(member, follow.created_at, member.id in mutual) for follow, member in rows],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+def following_page(db: Session, user: models.User, page: int, page_size: int) -> tuple[list[tuple[models.User, bool]], int]:
+    # 个人中心"关注"页仍按页码翻页：总数取 user_stats 里的物化计数，不再单独 COUNT。
+    rows = db.execute(_follow_select(user.id, "following").offset((page - 1) * page_size).limit(page_size)).all()
+    mutual = mutual_ids(db, user.id, "following", [member.id for _, member in rows])
+    total = user_stats.get_stats(db, user.id)["following_count"]
+    return [(member, member.id in mutual) for _, member in rows], total
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import settings
+from app.core.write_behind import WriteBehindBuffer
+from app.db import models
+from app.db.session import engine
+
+HistoryKey = tuple[int, int]
+
+
+class HistoryBuffer(WriteBehindBuffer):
+    # 浏览记录先按 (user_id, poem_id) 合并在内存里，批量 upsert 后顺带裁掉每个用户超出上限的旧记录。
+    def __init__(self, interval: float, max_per_user: int) -> None:
+        super().__init__("history", interval)
+        self.max_per_user = max_per_user
+        self._pending: dict[HistoryKey, datetime] = {}
+
+    def add(self, user_id: int, poem_id: int, viewed_at: datetime | None = None) -> None:
+        viewed_at = viewed_at or models.now()
+        with self._lock:
+            previous = self._pending.get((user_id, poem_id))
+            if previous is None or previous < viewed_at:
+                self._pending[(user_id, poem_id)] = viewed_at
+        self._after_add()
+
+    def discard_poem(self, poem_id: int) -> None:
+        with self._lock:
+            for key in [key for key in self._pending if key[1] == poem_id]:
+                del self._pending[key]
+
+    def _drain(self) -> dict[HistoryKey, datetime]:
+        batch = self._pending
+        self._pending = {}
+        return batch
+
+    def _requeue(self, batch: dict[HistoryKey, datetime]) -> None:
+        for key, viewed_at in batch.items():
+            previous = self._pending.get(key)
+            if previous is None or previous < viewed_at:
+                self._pending[key] = viewed_at
+
+    def _pending_count(self) -> int:
+        return len(self._pending)
+
+    def _apply(self, batch: dict[HistoryKey, datetime]) -> None:
+        table = models.BrowseHistory.__table__
+        rows = [{"user_id": user_id, "poem_id": poem_id, "viewed_at": viewed_at} for (user_id, poem_id), viewed_at in batch.items()]
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.poem_id],
+            set_={"viewed_at": stmt.excluded.viewed_at},
+            where=table.c.viewed_at < stmt.excluded.viewed_at,
+        )
+        user_ids = {user_id for user_id, _ in batch}
+        with engine.begin() as conn:
+            conn.execute(stmt, rows)
+            if self.max_per_user > 0:
+                conn.execute(trim_history_stmt(user_ids, self.max_per_user))
+
+
+def trim_history_stmt(user_ids: set[int], keep: int):
+    table = models.BrowseHistory.__table__
+    ranked = (
+        select(
+            table.c.id,
+            func.row_number().over(partition_by=table.c.user_id, order_by=(table.c.viewed_at.desc(), table.c.id.desc())).label("position"),
+        )
+        .where(table.c.user_id.in_(user_ids))
+        .subquery()
+    )
+    return delete(table).where(table.c.id.in_(select(ranked.c.id).where(ranked.c.position > keep)))
+
+
+history_buffer = HistoryBuffer(settings.history_flush_interval_ms / 1000, settings.history_max_per_user)
@@ -1,39 +1,71 @@
 from __future__ import annotations
 
-from sqlalchemy import func, or_, select
+from collections.abc import Iterable
+
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.cache import cache
+from app.core.cache import anonymous_list_key, cache
 from app.core.exceptions import BusinessError
 from app.db import models
-from app.services.serializers import poem_item
+from app.db.session import run_in_session
+from app.services import user_stats
+from app.services.counters import counter_buffer
+from app.services.history_buffer import history_buffer
+from app.services.reaction_cache import reaction_cache
+from app.services.serializers import overlay_poem_flags, poem_item
 from app.utils.pagination import clamp_page, clamp_page_size, page_dict, paginate_select
 
 
-def poem_hot_order() -> tuple:
+HOME_CACHE_KEY = "home:data:shared"
+HOME_CACHE_TTL = {"ttl": 1800, "stale_ttl": 300}
+POEM_DETAIL_TTL = 1800
+# 匿名列表页缓存：计数允许短暂滞后，内容变化时由后台写入按前缀清除。
+POEM_LIST_TTL = 30
+# 库里现有标签的集合，放在 poem:list: 前缀下，后台改诗词时随列表缓存一起清除。
+POEM_TAGS_KEY = "poem:list:tags"
+
+
+def hot_poems_select() -> Select:
+    # 按 poem_totals 的降序复合索引顺序读取，分页和 LIMIT 只扫描需要的那几行。
+    totals = models.PoemTotals
     return (
-        models.Poem.like_count.desc(),
-        models.Poem.favorite_count.desc(),
-        models.Poem.share_count.desc(),
-        models.Poem.id.asc(),
+        select(models.Poem)
+        .join(totals, totals.poem_id == models.Poem.id)
+        .order_by(totals.like_count.desc(), totals.favorite_count.desc(), totals.share_count.desc(), totals.poem_id.asc())
     )
 
 
-def favorite_ids_for_user(db: Session, user: models.User | None) -> set[int]:
-    if user is None:
+def favorite_ids_for_user(db: Session, user: models.User | None, poem_ids: Iterable[int]) -> set[int]:
+    # 只查当前页出现的诗词，收藏很多的用户也不会拖慢列表。
+    poem_ids = set(poem_ids)
+    if user is None or not poem_ids:
         return set()
-    return set(db.scalars(select(models.Favorite.poem_id).where(models.Favorite.user_id == user.id)).all())
+    cached = reaction_cache.members(db, user.id, "poem", "favorite", poem_ids)
+    if cached is not None:
+        return cached
+    return set(
+        db.scalars(
+            select(models.Favorite.poem_id).where(models.Favorite.user_id == user.id, models.Favorite.poem_id.in_(poem_ids))
+        ).all()
+    )
 
 
-def liked_ids_for_user(db: Session, user: models.User | None) -> set[int]:
-    if user is None:
+def liked_ids_for_user(db: Session, user: models.User | None, poem_ids: Iterable[int]) -> set[int]:
+    poem_ids = set(poem_ids)
+    if user is None or not poem_ids:
         return set()
+    cached = reaction_cache.members(db, user.id, "poem", "like", poem_ids)
+    if cached is not None:
+        return cached
     return set(
         db.scalars(
             select(models.SquareReaction.target_id).where(
                 models.SquareReaction.user_id == user.id,
                 models.SquareReaction.target_type == "poem",
                 models.SquareReaction.reaction_type == "like",
+                models.SquareReaction.target_id.in_(poem_ids),
             )
         ).all()
     )
@@ -47,75 +79,153 @@ def poem_counts(poem: models.Poem, favorite_ids: set[int] | None = None, liked_i
         "id": poem.id,
         "is_liked": poem.id in liked_ids,
         "is_favorite": poem.id in favorite_ids,
-        "like_count": poem.like_count,
-        "favorite_count": poem.favorite_count,
-        "share_count": poem.share_count,
+        "like_count": counter_buffer.current(poem, "like_count"),
+        "favorite_count": counter_buffer.current(poem, "favorite_count"),
+        "share_count": counter_buffer.current(poem, "share_count"),
     }
 
 
-def list_poems(db: Session, user: models.User | None, page: int = 1, page_size: int = 10, keyword: str | None = None) -> dict:
-    stmt = select(models.Poem).order_by(*poem_hot_order())
+def _load_known_tags(db: Session) -> frozenset[str]:
+    return frozenset(db.scalars(select(models.PoemTag.tag).distinct()).all())
+
+
+def _poem_list_key(
+    user: models.User | None,
+    page: int,
+    page_size: int,
+    keyword: str | None,
+    tag: str | None,
+    known_tags: frozenset[str] = frozenset(),
+) -> str | None:
+    # 关键词搜索组合太多，不缓存；标签只缓存库里存在的，随意传入的标签直接查库，不占缓存键。
+    if keyword or (tag and tag not in known_tags):
+        return None
+    return anonymous_list_key("poem:list", user, page, page_size, tag or "")
+
+
+def _load_poem_list(
+    db: Session,
+    user: models.User | None,
+    page: int = 1,
+    page_size: int = 10,
+    keyword: str | None = None,
+    tag: str | None = None,
+) -> dict:
+    stmt = hot_poems_select()
     if keyword:
         like = f"%{keyword}%"
         stmt = stmt.where(or_(models.Poem.title.like(like), models.Poem.author.like(like), models.Poem.content.like(like)))
+    if tag:
+        stmt = stmt.where(models.Poem.id.in_(select(models.PoemTag.poem_id).where(models.PoemTag.tag == tag)))
     rows, page, page_size, total = paginate_select(db, stmt, page, page_size)
-    favorite_ids = favorite_ids_for_user(db, user)
-    liked_ids = liked_ids_for_user(db, user)
+    favorite_ids, liked_ids = viewer_flags(db, user, [row.id for row in rows])
     return page_dict([poem_item(row, favorite_ids, liked_ids) for row in rows], page, page_size, total)
 
 
-def get_poem_detail(db: Session, poem_id: int, user: models.User | None) -> dict:
-    key = f"poem:detail:{poem_id}:{user.id if user else 0}"
-    cached = cache.get(key)
-    if cached is not None:
-        return cached
+def list_poems(
+    db: Session,
+    user: models.User | None,
+    page: int = 1,
+    page_size: int = 10,
+    keyword: str | None = None,
+    tag: str | None = None,
+) -> dict:
+    known_tags: frozenset[str] = frozenset()
+    if tag:
+        known_tags = cache.get_or_set(POEM_TAGS_KEY, lambda: _load_known_tags(db), ttl=POEM_LIST_TTL)
+    key = _poem_list_key(user, page, page_size, keyword, tag, known_tags)
+    if key is None:
+        return _load_poem_list(db, user, page, page_size, keyword, tag)
+    return cache.get_or_set(key, lambda: _load_poem_list(db, None, page, page_size, keyword, tag), ttl=POEM_LIST_TTL)
+
+
+def viewer_flags(db: Session, user: models.User | None, poem_ids: Iterable[int]) -> tuple[set[int], set[int]]:
+    if user is None:
+        return set(), set()
+    poem_ids = set(poem_ids)
+    return favorite_ids_for_user(db, user, poem_ids), liked_ids_for_user(db, user, poem_ids)
+
+
+def _load_poem_detail(db: Session, poem_id: int) -> dict:
     poem = db.get(models.Poem, poem_id)
     if poem is None:
         raise BusinessError("诗词不存在", code=40401, status_code=404)
-    favorite_ids = favorite_ids_for_user(db, user)
-    liked_ids = liked_ids_for_user(db, user)
-    data = poem_item(poem, favorite_ids, liked_ids)
+    data = poem_item(poem)
     data["related_poems"] = [
-        poem_item(item, favorite_ids, liked_ids)
+        poem_item(item)
         for item in db.scalars(
-            select(models.Poem).where(models.Poem.id != poem_id, models.Poem.author == poem.author).order_by(*poem_hot_order()).limit(3)
+            hot_poems_select().where(models.Poem.id != poem_id, models.Poem.author == poem.author).limit(3)
         ).all()
     ]
-    cache.set(key, data, ttl=1800)
     return data
 
 
-def home_data(db: Session, user: models.User | None) -> dict:
-    key = f"home:data:{user.id if user else 0}"
-    cached = cache.get(key)
-    if cached is not None:
-        return cached
-    poems = db.scalars(select(models.Poem).order_by(*poem_hot_order()).limit(10)).all()
-    favorite_ids = favorite_ids_for_user(db, user)
-    liked_ids = liked_ids_for_user(db, user)
+def poem_detail_payload(db: Session, poem_id: int) -> dict:
+    return cache.get_or_set(f"poem:detail:{poem_id}", lambda: _load_poem_detail(db, poem_id), ttl=POEM_DETAIL_TTL)
+
+
+def _detail_poem_ids(payload: dict) -> list[int]:
+    return [payload["id"], *(item["id"] for item in payload["related_poems"])]
+
+
+def _overlay_detail(payload: dict, favorite_ids: set[int], liked_ids: set[int]) -> dict:
+    data = overlay_poem_flags(payload, favorite_ids, liked_ids)
+    data["related_poems"] = [overlay_poem_flags(item, favorite_ids, liked_ids) for item in payload["related_poems"]]
+    return data
+
+
+def get_poem_detail(db: Session, poem_id: int, user: models.User | None) -> dict:
+    # 缓存里只放与用户无关的详情，收藏/点赞状态按请求叠加，避免每个用户各存一份。
+    payload = poem_detail_payload(db, poem_id)
+    if user is None:
+        return payload
+    return _overlay_detail(payload, *viewer_flags(db, user, _detail_poem_ids(payload)))
+
+
+def _load_home_payload(db: Session) -> dict:
+    poems = db.scalars(hot_poems_select().limit(10)).all()
     categories = db.scalars(select(models.Category).order_by(models.Category.sort_order.asc()).limit(8)).all()
-    data = {
+    return {
         "banners": [{"id": 1, "title": "今日诗意", "poem_id": poems[0].id if poems else 0}],
-        "today_poem": poem_item(poems[0], favorite_ids, liked_ids) if poems else None,
-        "recommend_poems": [poem_item(poem, favorite_ids, liked_ids) for poem in poems],
+        "today_poem": poem_item(poems[0]) if poems else None,
+        "recommend_poems": [poem_item(poem) for poem in poems],
         "categories": [{"id": item.id, "name": item.name, "type": item.type} for item in categories],
         "hot_keywords": ["花", "月", "山", "水", "春", "秋"],
     }
-    cache.set(key, data, ttl=300)
+
+
+def _refresh_home_payload() -> dict:
+    return run_in_session(_load_home_payload)
+
+
+def home_payload(db: Session) -> dict:
+    return cache.get_or_set(HOME_CACHE_KEY, lambda: _load_home_payload(db), refresh=_refresh_home_payload, **HOME_CACHE_TTL)
+
+
+def home_data(db: Session, user: models.User | None) -> dict:
+    payload = home_payload(db)
+    if user is None:
+        return payload
+    return _overlay_home(payload, *viewer_flags(db, user, [item["id"] for item in payload["recommend_poems"]]))
+
+
+def _overlay_home(payload: dict, favorite_ids: set[int], liked_ids: set[int]) -> dict:
+    data = dict(payload)
+    if payload["today_poem"] is not None:
+        data["today_poem"] = overlay_poem_flags(payload["today_poem"], favorite_ids, liked_ids)
+    data["recommend_poems"] = [overlay_poem_flags(item, favorite_ids, liked_ids) for item in payload["recommend_poems"]]
     return data
 
 
-def list_categories(db: Session) -> dict:
-    cached = cache.get("category:list")
-    if cached is not None:
-        return cached
-    poem_count = func.count(models.PoemCategory.poem_id).label("poem_count")
-    rows = db.execute(
-        select(models.Category, poem_count)
-        .outerjoin(models.PoemCategory, models.PoemCategory.category_id == models.Category.id)
-        .group_by(models.Category.id, models.Category.name, models.Category.type, models.Category.sort_order)
-        .order_by(models.Category.sort_order.asc(), models.Category.id.asc())
-    ).all()
+def _load_categories(db: Session) -> dict:
+    poem_count = (
+        select(func.count(models.PoemCategory.poem_id))
+        .where(models.PoemCategory.category_id == models.Category.id)
+        .correlate(models.Category)
+        .scalar_subquery()
+        .label("poem_count")
+    )
+    rows = db.execute(select(models.Category, poem_count).order_by(models.Category.sort_order.asc(), models.Category.id.asc())).all()
     items = [
         {
             "id": category.id,
@@ -127,22 +237,36 @@ def list_categories(db: Session) -> dict:
         }
         for category, count in rows
     ]
-    data = {"items": items}
-    cache.set("category:list", data, ttl=1800)
-    return data
+    return {"items": items}
+
+
+def list_categories(db: Session) -> dict:
+    return cache.get_or_set(
+        "category:list",
+        lambda: _load_categories(db),
+        ttl=7200,
+        stale_ttl=1800,
+        refresh=lambda: run_in_session(_load_categories),
+    )
 
 
 def list_category_poems(db: Session, category_id: int, user: models.User | None, page: int, page_size: int) -> dict:
+    key = anonymous_list_key("category:poems", user, page, page_size, category_id)
+    if key is None:
+        return _load_category_poems(db, category_id, user, page, page_size)
+    return cache.get_or_set(key, lambda: _load_category_poems(db, category_id, None, page, page_size), ttl=POEM_LIST_TTL)
+
+
+def _load_category_poems(db: Session, category_id: int, user: models.User | None, page: int, page_size: int) -> dict:
     page = clamp_page(page)
     page_size = clamp_page_size(page_size)
     category = db.get(models.Category, category_id)
     if category is None:
         raise BusinessError("分类不存在", code=40402, status_code=404)
     poem_ids = select(models.PoemCategory.poem_id).where(models.PoemCategory.category_id == category_id)
-    stmt = select(models.Poem).where(models.Poem.id.in_(poem_ids)).order_by(*poem_hot_order())
+    stmt = hot_poems_select().where(models.Poem.id.in_(poem_ids))
     rows, page, page_size, total = paginate_select(db, stmt, page, page_size)
-    favorite_ids = favorite_ids_for_user(db, user)
-    liked_ids = liked_ids_for_user(db, user)
+    favorite_ids, liked_ids = viewer_flags(db, user, [row.id for row in rows])
     return page_dict([poem_item(row, favorite_ids, liked_ids) for row in rows], page, page_size, total)
 
 
@@ -153,29 +277,25 @@ def add_favorite(db: Session, user: models.User, poem_id: int) -> dict:
     exists = db.scalar(select(models.Favorite).where(models.Favorite.user_id == user.id, models.Favorite.poem_id == poem_id))
     if exists is None:
         db.add(models.Favorite(user_id=user.id, poem_id=poem_id))
-        poem.favorite_count += 1
+        user_stats.bump(db, user.id, favorite_count=1)
         db.commit()
-        cache.clear_prefix("poem:detail:")
-        cache.clear_prefix("home:data:")
-    else:
-        db.refresh(poem)
-    return poem_counts(poem, {poem_id}, liked_ids_for_user(db, user))
+        reaction_cache.update(user.id, "poem", "favorite", poem_id, True)
+        counter_buffer.add(models.Poem, poem_id, "favorite_count", 1)
+    return poem_counts(poem, {poem_id}, liked_ids_for_user(db, user, [poem_id]))
 
 
 def remove_favorite(db: Session, user: models.User, poem_id: int) -> dict:
     favorite = db.scalar(select(models.Favorite).where(models.Favorite.user_id == user.id, models.Favorite.poem_id == poem_id))
     if favorite is not None:
-        poem = db.get(models.Poem, poem_id)
         db.delete(favorite)
-        if poem is not None:
-            poem.favorite_count = max(0, poem.favorite_count - 1)
+        user_stats.bump(db, user.id, favorite_count=-1)
         db.commit()
-        cache.clear_prefix("poem:detail:")
-        cache.clear_prefix("home:data:")
+        reaction_cache.update(user.id, "poem", "favorite", poem_id, False)
+        counter_buffer.add(models.Poem, poem_id, "favorite_count", -1)
     poem = db.get(models.Poem, poem_id)
     if poem is None:
         raise BusinessError("诗词不存在", code=40401, status_code=404)
-    return poem_counts(poem, set(), liked_ids_for_user(db, user))
+    return poem_counts(poem, set(), liked_ids_for_user(db, user, [poem_id]))
 
 
 def set_like(db: Session, user: models.User, poem_id: int, active: bool) -> dict:
@@ -193,37 +313,32 @@ def set_like(db: Session, user: models.User, poem_id: int, active: bool) -> dict
 
     if active and reaction is None:
         db.add(models.SquareReaction(user_id=user.id, target_type="poem", target_id=poem_id, reaction_type="like"))
-        poem.like_count += 1
+        user_stats.bump(db, user.id, like_count=1)
         db.commit()
-        cache.clear_prefix("poem:detail:")
-        cache.clear_prefix("home:data:")
+        reaction_cache.update(user.id, "poem", "like", poem_id, True)
+        counter_buffer.add(models.Poem, poem_id, "like_count", 1)
     elif not active and reaction is not None:
         db.delete(reaction)
-        poem.like_count = max(0, poem.like_count - 1)
+        user_stats.bump(db, user.id, like_count=-1)
         db.commit()
-        cache.clear_prefix("poem:detail:")
-        cache.clear_prefix("home:data:")
-    else:
-        db.refresh(poem)
+        reaction_cache.update(user.id, "poem", "like", poem_id, False)
+        counter_buffer.add(models.Poem, poem_id, "like_count", -1)
 
-    return poem_counts(poem, favorite_ids_for_user(db, user), {poem_id} if active else set())
+    return poem_counts(poem, favorite_ids_for_user(db, user, [poem_id]), {poem_id} if active else set())
 
 
 def increase_share(db: Session, poem_id: int) -> dict:
     poem = db.get(models.Poem, poem_id)
     if poem is None:
         raise BusinessError("诗词不存在", code=40401, status_code=404)
-    poem.share_count += 1
-    db.commit()
-    cache.clear_prefix("poem:detail:")
-    cache.clear_prefix("home:data:")
+    counter_buffer.add(models.Poem, poem_id, "share_count", 1)
     return poem_counts(poem)
 
 
 def list_favorites(db: Session, user: models.User, page: int, page_size: int) -> dict:
     stmt = select(models.Favorite).where(models.Favorite.user_id == user.id).order_by(models.Favorite.created_at.desc())
     rows, page, page_size, total = paginate_select(db, stmt, page, page_size)
-    liked_ids = liked_ids_for_user(db, user)
+    liked_ids = liked_ids_for_user(db, user, [row.poem_id for row in rows])
     items = [poem_item(row.poem, {row.poem_id}, liked_ids) for row in rows if row.poem is not None]
     return page_dict(items, page, page_size, total)
 
@@ -232,19 +347,45 @@ def record_history(db: Session, user: models.User, poem_id: int) -> dict:
     poem = db.get(models.Poem, poem_id)
     if poem is None:
         raise BusinessError("诗词不存在", code=40401, status_code=404)
-    history = db.scalar(select(models.BrowseHistory).where(models.BrowseHistory.user_id == user.id, models.BrowseHistory.poem_id == poem_id))
-    if history is None:
-        db.add(models.BrowseHistory(user_id=user.id, poem_id=poem_id))
-    else:
-        history.viewed_at = models.now()
-    db.commit()
+    history_buffer.add(user.id, poem_id)
     return {"poem_id": poem_id, "recorded": True}
 
 
 def list_history(db: Session, user: models.User, page: int, page_size: int) -> dict:
+    history_buffer.flush()
     stmt = select(models.BrowseHistory).where(models.BrowseHistory.user_id == user.id).order_by(models.BrowseHistory.viewed_at.desc())
     rows, page, page_size, total = paginate_select(db, stmt, page, page_size)
-    favorite_ids = favorite_ids_for_user(db, user)
-    liked_ids = liked_ids_for_user(db, user)
+    favorite_ids, liked_ids = viewer_flags(db, user, [row.poem_id for row in rows])
     items = [poem_item(row.poem, favorite_ids, liked_ids) for row in rows if row.poem is not None]
     return page_dict(items, page, page_size, total)
+
+
+async def list_poems_async(
+    db: AsyncSession,
+    user: models.User | None,
+    page: int = 1,
+    page_size: int = 10,
+    keyword: str | None = None,
+    tag: str | None = None,
+) -> dict:
+    known_tags: frozenset[str] = frozenset()
+    if tag:
+        known_tags = await cache.aget_or_set(POEM_TAGS_KEY, lambda: db.run_sync(_load_known_tags), ttl=POEM_LIST_TTL)
+    key = _poem_list_key(user, page, page_size, keyword, tag, known_tags)
+    if key is None:
+        return await db.run_sync(_load_poem_list, user, page, page_size, keyword, tag)
+    return await cache.aget_or_set(key, lambda: db.run_sync(_load_poem_list, None, page, page_size, keyword, tag), ttl=POEM_LIST_TTL)
+
+
+async def get_poem_detail_async(db: AsyncSession, poem_id: int, user: models.User | None) -> dict:
+    payload = await cache.aget_or_set(f"poem:detail:{poem_id}", lambda: db.run_sync(_load_poem_detail, poem_id), ttl=POEM_DETAIL_TTL)
+    if user is None:
+        return payload
+    return _overlay_detail(payload, *await db.run_sync(viewer_flags, user, _detail_poem_ids(payload)))
+
+
+async def home_data_async(db: AsyncSession, user: models.User | None) -> dict:
+    payload = await cache.aget_or_set(HOME_CACHE_KEY, lambda: db.run_sync(_load_home_payload), refresh=_refresh_home_payload, **HOME_CACHE_TTL)
+    if user is None:
+        return payload
+    return _overlay_home(payload, *await db.run_sync(viewer_flags, user, [item["id"] for item in payload["recommend_poems"]]))
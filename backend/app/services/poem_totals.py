@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import bindparam, delete, func, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.db import models
+
+TOTAL_FIELDS = ("like_count", "favorite_count", "share_count")
+
+
+def apply_deltas(conn: Any, field: str, params: list[dict[str, int]]) -> None:
+    # 与分片计数在同一事务里累加汇总行；params 与 counters 相同，为 {"row_id", "delta"}，已删除的诗词跳过。
+    table = models.PoemTotals.__table__
+    rows = select(models.Poem.id, bindparam("delta")).where(models.Poem.id == bindparam("row_id"))
+    stmt = sqlite_insert(table).from_select(["poem_id", field], rows)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.poem_id], set_={field: table.c[field] + stmt.excluded[field]})
+    conn.execute(stmt, params)
+
+
+def recompute(conn: Any, poem_ids: Iterable[int] | None = None) -> int:
+    # 从 poem_stats 重算汇总，用于新建/编辑诗词、导入数据、旧库升级；没有分片行的诗词也会得到一行 0。
+    table = models.PoemTotals.__table__
+    stats = models.PoemStats
+    # WHERE 不可省略：SQLite 解析 INSERT ... SELECT ... ON CONFLICT 时需要它消除歧义。
+    source = (
+        select(models.Poem.id, *(func.coalesce(func.sum(stats.__table__.c[field]), 0) for field in TOTAL_FIELDS))
+        .outerjoin(stats, stats.poem_id == models.Poem.id)
+        .where(true())
+        .group_by(models.Poem.id)
+    )
+    if poem_ids is not None:
+        source = source.where(models.Poem.id.in_(set(poem_ids)))
+    stmt = sqlite_insert(table).from_select(["poem_id", *TOTAL_FIELDS], source)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.poem_id], set_={field: stmt.excluded[field] for field in TOTAL_FIELDS})
+    return conn.execute(stmt).rowcount
+
+
+def remove(conn: Any, poem_id: int) -> None:
+    conn.execute(delete(models.PoemTotals).where(models.PoemTotals.poem_id == poem_id))
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.membership_cache import MembershipCache
+from app.db import models
+
+ReactionKey = tuple[str, str]
+
+
+# 按用户缓存收藏/点赞集合，供列表页批量叠加个人状态；记录数超过 max_members 的用户回退到按页查询。
+class ReactionCache(MembershipCache):
+    def _load(self, db: Session, user_id: int, limit: int) -> dict[ReactionKey, set[int]]:
+        favorites = db.scalars(select(models.Favorite.poem_id).where(models.Favorite.user_id == user_id).limit(limit)).all()
+        entry: dict[ReactionKey, set[int]] = {("poem", "favorite"): set(favorites)}
+        if len(favorites) >= limit:
+            return entry
+        rows = db.execute(
+            select(models.SquareReaction.target_type, models.SquareReaction.reaction_type, models.SquareReaction.target_id)
+            .where(models.SquareReaction.user_id == user_id)
+            .limit(limit - len(favorites))
+        ).all()
+        for target_type, reaction_type, target_id in rows:
+            entry.setdefault((target_type, reaction_type), set()).add(target_id)
+        return entry
+
+    def members(self, db: Session, user_id: int, target_type: str, reaction_type: str, target_ids: Iterable[int]) -> set[int] | None:
+        entry = self._entry(db, user_id)
+        if entry is None:
+            return None
+        return entry.get((target_type, reaction_type), set()).intersection(target_ids)
+
+    def update(self, user_id: int, target_type: str, reaction_type: str, target_id: int, active: bool) -> None:
+        with self._lock:
+            entry = self._touch(user_id)
+            if entry is None:
+                return
+            ids = entry.setdefault((target_type, reaction_type), set())
+            if active:
+                ids.add(target_id)
+            else:
+                ids.discard(target_id)
+
+
+reaction_cache = ReactionCache(settings.reaction_cache_users, settings.reaction_cache_max_members)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.schemas.reaction import ReactionOperation
+from app.services import user_stats
+from app.services.counters import CounterKey, apply_counter_deltas, counter_buffer, invalidate_counter_caches
+from app.services.reaction_cache import reaction_cache
+
+ReactionKey = tuple[str, int, str]
+
+TARGET_MODELS: dict[str, type[models.Base]] = {
+    "poem": models.Poem,
+    "topic": models.SquareTopic,
+    "comment": models.SquareComment,
+}
+COUNT_FIELDS = {"like": "like_count", "favorite": "favorite_count"}
+
+
+def _existing_targets(db: Session, wanted: dict[str, set[int]]) -> dict[str, set[int]]:
+    existing: dict[str, set[int]] = {}
+    for target_type, ids in wanted.items():
+        model = TARGET_MODELS[target_type]
+        existing[target_type] = set(db.scalars(select(model.id).where(model.id.in_(ids))).all())
+    return existing
+
+
+def _current_reactions(db: Session, user: models.User, wanted: dict[str, set[int]]) -> set[ReactionKey]:
+    current: set[ReactionKey] = set()
+    poem_ids = wanted.get("poem", set())
+    if poem_ids:
+        favorites = db.scalars(
+            select(models.Favorite.poem_id).where(models.Favorite.user_id == user.id, models.Favorite.poem_id.in_(poem_ids))
+        ).all()
+        current.update(("poem", poem_id, "favorite") for poem_id in favorites)
+    for target_type, ids in wanted.items():
+        rows = db.execute(
+            select(models.SquareReaction.target_id, models.SquareReaction.reaction_type).where(
+                models.SquareReaction.user_id == user.id,
+                models.SquareReaction.target_type == target_type,
+                models.SquareReaction.target_id.in_(ids),
+            )
+        ).all()
+        current.update((target_type, target_id, reaction_type) for target_id, reaction_type in rows if (target_type, reaction_type) != ("poem", "favorite"))
+    return current
+
+
+def _delete_reactions(db: Session, user: models.User, keys: list[ReactionKey]) -> list[ReactionKey]:
+    # 返回实际删除的关系：快照之后被单条接口抢先删掉的行不再计入计数变化。
+    grouped: dict[tuple[str, str], list[int]] = defaultdict(list)
+    for target_type, target_id, reaction_type in keys:
+        grouped[(target_type, reaction_type)].append(target_id)
+    deleted: list[ReactionKey] = []
+    for (target_type, reaction_type), ids in grouped.items():
+        if (target_type, reaction_type) == ("poem", "favorite"):
+            stmt = (
+                delete(models.Favorite)
+                .where(models.Favorite.user_id == user.id, models.Favorite.poem_id.in_(ids))
+                .returning(models.Favorite.poem_id)
+            )
+        else:
+            stmt = (
+                delete(models.SquareReaction)
+                .where(
+                    models.SquareReaction.user_id == user.id,
+                    models.SquareReaction.target_type == target_type,
+                    models.SquareReaction.reaction_type == reaction_type,
+                    models.SquareReaction.target_id.in_(ids),
+                )
+                .returning(models.SquareReaction.target_id)
+            )
+        deleted.extend((target_type, target_id, reaction_type) for target_id in db.scalars(stmt).all())
+    return deleted
+
+
+def _insert_reactions(db: Session, user: models.User, keys: list[ReactionKey]) -> list[ReactionKey]:
+    # 按唯一约束忽略已存在的行，返回实际插入的关系；快照之后被单条接口抢先写入的行不会让整批失败。
+    favorites = [{"user_id": user.id, "poem_id": target_id} for target_type, target_id, reaction_type in keys if (target_type, reaction_type) == ("poem", "favorite")]
+    reactions = [
+        {"user_id": user.id, "target_type": target_type, "target_id": target_id, "reaction_type": reaction_type}
+        for target_type, target_id, reaction_type in keys
+        if (target_type, reaction_type) != ("poem", "favorite")
+    ]
+    inserted: list[ReactionKey] = []
+    if favorites:
+        stmt = sqlite_insert(models.Favorite).on_conflict_do_nothing().returning(models.Favorite.poem_id)
+        inserted.extend(("poem", poem_id, "favorite") for poem_id in db.scalars(stmt, favorites).all())
+    if reactions:
+        table = models.SquareReaction
+        stmt = sqlite_insert(table).on_conflict_do_nothing().returning(table.target_type, table.target_id, table.reaction_type)
+        inserted.extend(tuple(row) for row in db.execute(stmt, reactions).all())
+    return inserted
+
+
+def _changed_counts(db: Session, changed: set[tuple[str, int]]) -> list[dict[str, Any]]:
+    grouped: dict[str, set[int]] = defaultdict(set)
+    for target_type, target_id in changed:
+        grouped[target_type].add(target_id)
+    items: list[dict[str, Any]] = []
+    for target_type, ids in grouped.items():
+        model = TARGET_MODELS[target_type]
+        for row in db.scalars(select(model).where(model.id.in_(ids)).order_by(model.id)).all():
+            items.append(
+                {
+                    "target_type": target_type,
+                    "target_id": row.id,
+                    "like_count": counter_buffer.current(row, "like_count"),
+                    "favorite_count": counter_buffer.current(row, "favorite_count"),
+                }
+            )
+    return items
+
+
+def sync_reactions(db: Session, user: models.User, operations: list[ReactionOperation]) -> dict:
+    # 同一目标的多次切换只保留最后一次，然后整批按集合计算需要插入、删除的关系，在一个事务里写入。
+    desired: dict[ReactionKey, bool] = {}
+    for operation in operations:
+        desired[(operation.target_type, operation.target_id, operation.reaction_type)] = operation.active
+
+    requested = len(desired)
+    wanted: dict[str, set[int]] = defaultdict(set)
+    for target_type, target_id, _ in desired:
+        wanted[target_type].add(target_id)
+    existing = _existing_targets(db, wanted)
+    desired = {key: active for key, active in desired.items() if key[1] in existing[key[0]]}
+    current = _current_reactions(db, user, wanted)
+
+    to_insert = [key for key, active in desired.items() if active and key not in current]
+    to_delete = [key for key, active in desired.items() if not active and key in current]
+    to_delete = _delete_reactions(db, user, to_delete) if to_delete else []
+    to_insert = _insert_reactions(db, user, to_insert) if to_insert else []
+    deltas: dict[CounterKey, int] = defaultdict(int)
+    for keys, delta in ((to_insert, 1), (to_delete, -1)):
+        for target_type, target_id, reaction_type in keys:
+            deltas[(TARGET_MODELS[target_type].__tablename__, target_id, COUNT_FIELDS[reaction_type])] += delta
+    if deltas:
+        apply_counter_deltas(db.connection(), deltas)
+    stat_deltas: dict[str, int] = defaultdict(int)
+    for keys, delta in ((to_insert, 1), (to_delete, -1)):
+        for target_type, _, reaction_type in keys:
+            if reaction_type == "like":
+                stat_deltas["like_count"] += delta
+            elif target_type == "poem":
+                stat_deltas["favorite_count"] += delta
+    user_stats.bump(db, user.id, **stat_deltas)
+    db.commit()
+
+    for keys, active in ((to_insert, True), (to_delete, False)):
+        for target_type, target_id, reaction_type in keys:
+            reaction_cache.update(user.id, target_type, target_id=target_id, reaction_type=reaction_type, active=active)
+    invalidate_counter_caches(deltas)
+
+    changed = {(target_type, target_id) for target_type, target_id, _ in to_insert + to_delete}
+    return {
+        "applied": len(to_insert) + len(to_delete),
+        "skipped": requested - len(desired),
+        "changed": _changed_counts(db, changed),
+    }
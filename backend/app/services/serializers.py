@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Any
 
 from app.db import models
+from app.services.counters import counter_buffer
 from app.utils.json_util import parse_json_list
 
 
@@ -45,6 +46,7 @@ def user_detail(user: models.User, stats: dict[str, int] | None = None) -> dict[
             "like_count": 0,
             "favorite_count": 0,
             "following_count": 0,
+            "follower_count": 0,
         }
     )
     if stats:
@@ -52,6 +54,12 @@ def user_detail(user: models.User, stats: dict[str, int] | None = None) -> dict[
     return data
 
 
+def follow_item(user: models.User, followed_at: datetime, mutual: bool) -> dict[str, Any]:
+    data = user_public(user)
+    data.update({"bio": user.bio, "mutual": mutual, "followedAt": human_time(followed_at)})
+    return data
+
+
 def poem_item(
     poem: models.Poem,
     favorite_ids: set[int] | None = None,
@@ -66,15 +74,22 @@ def poem_item(
         "author": poem.author,
         "content": poem.content,
         "recommend_sentence": poem.recommend_sentence,
-        "tags": parse_json_list(poem.tags),
+        "tags": poem.tags,
         "is_favorite": poem.id in favorite_ids,
         "is_liked": poem.id in liked_ids,
-        "like_count": poem.like_count,
-        "favorite_count": poem.favorite_count,
-        "share_count": poem.share_count,
+        "like_count": counter_buffer.current(poem, "like_count"),
+        "favorite_count": counter_buffer.current(poem, "favorite_count"),
+        "share_count": counter_buffer.current(poem, "share_count"),
     }
 
 
+def overlay_poem_flags(item: dict[str, Any], favorite_ids: set[int], liked_ids: set[int]) -> dict[str, Any]:
+    data = dict(item)
+    data["is_favorite"] = item["id"] in favorite_ids
+    data["is_liked"] = item["id"] in liked_ids
+    return data
+
+
 def square_comment_item(comment: models.SquareComment, liked: bool = False, favorited: bool = False) -> dict[str, Any]:
     return {
         "id": comment.id,
@@ -83,8 +98,8 @@ def square_comment_item(comment: models.SquareComment, liked: bool = False, favo
         "avatarTone": "green",
         "content": comment.content,
         "time": human_time(comment.created_at),
-        "likeCount": comment.like_count,
-        "favoriteCount": comment.favorite_count,
+        "likeCount": counter_buffer.current(comment, "like_count"),
+        "favoriteCount": counter_buffer.current(comment, "favorite_count"),
         "isLiked": liked,
         "isFavorited": favorited,
     }
@@ -96,7 +111,9 @@ def square_topic_item(
     favorite_ids: set[int] | None = None,
     comment_liked_ids: set[int] | None = None,
     comment_favorite_ids: set[int] | None = None,
+    comments: list[models.SquareComment] | None = None,
 ) -> dict[str, Any]:
+    comments = comments or []
     liked_ids = liked_ids or set()
     favorite_ids = favorite_ids or set()
     comment_liked_ids = comment_liked_ids or set()
@@ -110,14 +127,15 @@ def square_topic_item(
         "time": human_time(topic.created_at),
         "author": user_public(topic.author),
         "images": parse_json_list(topic.images),
-        "likeCount": topic.like_count,
-        "favoriteCount": topic.favorite_count,
-        "shareCount": topic.share_count,
+        "likeCount": counter_buffer.current(topic, "like_count"),
+        "favoriteCount": counter_buffer.current(topic, "favorite_count"),
+        "shareCount": counter_buffer.current(topic, "share_count"),
+        "commentCount": topic.comment_count,
         "isLiked": topic.id in liked_ids,
         "isFavorited": topic.id in favorite_ids,
         "comments": [
             square_comment_item(comment, comment.id in comment_liked_ids, comment.id in comment_favorite_ids)
-            for comment in sorted(topic.comments, key=lambda item: item.created_at, reverse=True)
+            for comment in comments
         ],
     }
 
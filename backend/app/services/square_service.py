@@ -1,65 +1,179 @@
 from __future__ import annotations
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from collections.abc import Iterable
 
-from app.core.cache import cache
+from sqlalchemy import Select, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from app.core.cache import anonymous_list_key, cache
 from app.core.exceptions import BusinessError
 from app.db import models
 from app.schemas.square import SquareCommentCreate, SquareTopicCreate
-from app.services.serializers import square_topic_item
+from app.services import user_stats
+from app.services.counters import counter_buffer
+from app.services.feed_inbox import fanout_buffer
+from app.services.reaction_cache import reaction_cache
+from app.services.serializers import square_comment_item, square_topic_item
+from app.services.trending import HOT_BASE_SCORE, HOT_WEIGHTS, hot_score_plus
 from app.utils.json_util import dump_json_list
-from app.utils.pagination import page_dict, paginate_select
+from app.utils.pagination import decode_cursor, encode_cursor, page_dict, paginate_select
 
+# 动态流每条话题只内嵌最新的几条评论，完整列表在详情页查看。
+FEED_COMMENT_PREVIEW = 3
+# 匿名访问内容流前几页的缓存时间；发帖、评论和后台删改时清除 square:feed: 前缀。
+FEED_CACHE_TTL = 15
+# 话题详情内嵌的第一页评论条数，后续页走 /square/feed/{topic_id}/comments。
+COMMENT_PAGE_SIZE = 20
 
-def _reaction_ids(db: Session, user: models.User | None, target_type: str, reaction_type: str) -> set[int]:
-    if user is None:
-        return set()
-    return set(
-        db.scalars(
-            select(models.SquareReaction.target_id).where(
-                models.SquareReaction.user_id == user.id,
-                models.SquareReaction.target_type == target_type,
-                models.SquareReaction.reaction_type == reaction_type,
-            )
-        ).all()
+
+def _reaction_ids(db: Session, user: models.User | None, target_type: str, target_ids: Iterable[int]) -> tuple[set[int], set[int]]:
+    target_ids = set(target_ids)
+    if user is None or not target_ids:
+        return set(), set()
+    cached_likes = reaction_cache.members(db, user.id, target_type, "like", target_ids)
+    if cached_likes is not None:
+        return cached_likes, reaction_cache.members(db, user.id, target_type, "favorite", target_ids) or set()
+    liked: set[int] = set()
+    favorited: set[int] = set()
+    rows = db.execute(
+        select(models.SquareReaction.reaction_type, models.SquareReaction.target_id).where(
+            models.SquareReaction.user_id == user.id,
+            models.SquareReaction.target_type == target_type,
+            models.SquareReaction.reaction_type.in_(("like", "favorite")),
+            models.SquareReaction.target_id.in_(target_ids),
+        )
+    ).all()
+    for reaction_type, target_id in rows:
+        (liked if reaction_type == "like" else favorited).add(target_id)
+    return liked, favorited
+
+
+def _topic_reactions(
+    db: Session,
+    user: models.User | None,
+    topics: Iterable[models.SquareTopic],
+    comments: Iterable[models.SquareComment],
+) -> tuple[set[int], ...]:
+    topic_likes, topic_favorites = _reaction_ids(db, user, "topic", [topic.id for topic in topics])
+    comment_likes, comment_favorites = _reaction_ids(db, user, "comment", [comment.id for comment in comments])
+    return topic_likes, topic_favorites, comment_likes, comment_favorites
+
+
+def latest_comments(db: Session, topic_ids: Iterable[int], limit: int) -> dict[int, list[models.SquareComment]]:
+    # 每个话题按 (topic_id, created_at) 索引倒序只取 limit 条，查询量与话题下的评论总数无关。
+    topic_ids = list(topic_ids)
+    if not topic_ids:
+        return {}
+    newest = aliased(models.SquareComment)
+    newest_ids = (
+        select(newest.id)
+        .where(newest.topic_id == models.SquareTopic.id)
+        .order_by(newest.created_at.desc(), newest.id.desc())
+        .limit(limit)
     )
+    rows = db.scalars(
+        select(models.SquareComment)
+        .join(models.SquareTopic, models.SquareComment.id.in_(newest_ids))
+        .where(models.SquareTopic.id.in_(topic_ids))
+        .options(selectinload(models.SquareComment.author))
+    ).all()
+    grouped: dict[int, list[models.SquareComment]] = {topic_id: [] for topic_id in topic_ids}
+    for comment in rows:
+        grouped[comment.topic_id].append(comment)
+    for comments in grouped.values():
+        comments.sort(key=lambda item: (item.created_at, item.id), reverse=True)
+    return grouped
 
 
-def list_feed(db: Session, user: models.User | None, page: int, page_size: int) -> dict:
-    stmt = (
+def _following_select(user: models.User | None) -> Select:
+    # 关注流只读当前用户的收件箱，按 (user_id, created_at) 索引范围扫描，再按主键取话题。
+    if user is None:
+        raise BusinessError("请先登录", code=40100, status_code=401)
+    return (
         select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments).selectinload(models.SquareComment.author))
-        .order_by(models.SquareTopic.created_at.desc())
+        .join(models.FeedInbox, models.FeedInbox.topic_id == models.SquareTopic.id)
+        .where(models.FeedInbox.user_id == user.id)
+        .order_by(models.FeedInbox.created_at.desc(), models.FeedInbox.id.desc())
     )
+
+
+def _feed_key(user: models.User | None, page: int, page_size: int, sort: str, scope: str) -> str | None:
+    if scope != "all":
+        return None
+    return anonymous_list_key("square:feed", user, page, page_size, sort)
+
+
+def list_feed(db: Session, user: models.User | None, page: int, page_size: int, sort: str = "latest", scope: str = "all") -> dict:
+    key = _feed_key(user, page, page_size, sort, scope)
+    if key is None:
+        return _load_feed(db, user, page, page_size, sort, scope)
+    return cache.get_or_set(key, lambda: _load_feed(db, None, page, page_size, sort, scope), ttl=FEED_CACHE_TTL)
+
+
+def _load_feed(db: Session, user: models.User | None, page: int, page_size: int, sort: str, scope: str) -> dict:
+    if scope == "following":
+        # 关注流只按收件箱时间倒序翻页，不支持热度排序，显式拒绝而不是悄悄忽略 sort。
+        if sort != "latest":
+            raise BusinessError("关注流仅支持按最新排序")
+        stmt = _following_select(user)
+    elif sort == "hot":
+        stmt = select(models.SquareTopic).order_by(models.SquareTopic.hot_score.desc(), models.SquareTopic.id.desc())
+    else:
+        stmt = select(models.SquareTopic).order_by(models.SquareTopic.created_at.desc())
+    stmt = stmt.options(selectinload(models.SquareTopic.author))
     rows, page, page_size, total = paginate_select(db, stmt, page, page_size)
-    topic_likes = _reaction_ids(db, user, "topic", "like")
-    topic_favorites = _reaction_ids(db, user, "topic", "favorite")
-    comment_likes = _reaction_ids(db, user, "comment", "like")
-    comment_favorites = _reaction_ids(db, user, "comment", "favorite")
+    previews = latest_comments(db, [row.id for row in rows], FEED_COMMENT_PREVIEW)
+    reactions = _topic_reactions(db, user, rows, [comment for comments in previews.values() for comment in comments])
     return page_dict(
-        [square_topic_item(row, topic_likes, topic_favorites, comment_likes, comment_favorites) for row in rows],
+        [square_topic_item(row, *reactions, comments=previews[row.id]) for row in rows],
         page,
         page_size,
         total,
     )
 
 
-def get_topic(db: Session, user: models.User | None, topic_id: int) -> dict:
-    topic = db.scalar(
-        select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments).selectinload(models.SquareComment.author))
-        .where(models.SquareTopic.id == topic_id)
+def _comment_page(db: Session, topic_id: int, cursor: str | None, limit: int) -> tuple[list[models.SquareComment], str | None]:
+    # 按 (created_at, id) 倒序做键集分页，翻到多深都只走 (topic_id, created_at) 索引的一段范围。
+    stmt = (
+        select(models.SquareComment)
+        .options(selectinload(models.SquareComment.author))
+        .where(models.SquareComment.topic_id == topic_id)
+        .order_by(models.SquareComment.created_at.desc(), models.SquareComment.id.desc())
+        .limit(limit + 1)
     )
+    if cursor:
+        try:
+            created_at, comment_id = decode_cursor(cursor)
+        except ValueError:
+            raise BusinessError("分页游标无效") from None
+        stmt = stmt.where(tuple_(models.SquareComment.created_at, models.SquareComment.id) < (created_at, comment_id))
+    comments = list(db.scalars(stmt).all())
+    if len(comments) <= limit:
+        return comments, None
+    comments = comments[:limit]
+    return comments, encode_cursor(comments[-1].created_at, comments[-1].id)
+
+
+def get_topic(db: Session, user: models.User | None, topic_id: int) -> dict:
+    topic = db.scalar(select(models.SquareTopic).options(selectinload(models.SquareTopic.author)).where(models.SquareTopic.id == topic_id))
     if topic is None:
         raise BusinessError("内容不存在", code=40403, status_code=404)
-    return square_topic_item(
-        topic,
-        _reaction_ids(db, user, "topic", "like"),
-        _reaction_ids(db, user, "topic", "favorite"),
-        _reaction_ids(db, user, "comment", "like"),
-        _reaction_ids(db, user, "comment", "favorite"),
-    )
+    comments, next_cursor = _comment_page(db, topic_id, None, COMMENT_PAGE_SIZE)
+    item = square_topic_item(topic, *_topic_reactions(db, user, [topic], comments), comments=comments)
+    return {**item, "commentsNextCursor": next_cursor}
+
+
+def list_comments(db: Session, user: models.User | None, topic_id: int, cursor: str | None, limit: int) -> dict:
+    if db.get(models.SquareTopic, topic_id) is None:
+        raise BusinessError("内容不存在", code=40403, status_code=404)
+    comments, next_cursor = _comment_page(db, topic_id, cursor, limit)
+    liked, favorited = _reaction_ids(db, user, "comment", [comment.id for comment in comments])
+    return {
+        "items": [square_comment_item(comment, comment.id in liked, comment.id in favorited) for comment in comments],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
 
 
 def create_topic(db: Session, user: models.User, data: SquareTopicCreate) -> dict:
@@ -72,10 +186,13 @@ def create_topic(db: Session, user: models.User, data: SquareTopicCreate) -> dic
         badge=badge,
         tags=dump_json_list(data.tags or [badge]),
         images=dump_json_list(data.images),
+        hot_score=HOT_BASE_SCORE,
     )
     db.add(topic)
+    user_stats.bump(db, user.id, topic_count=1)
     db.commit()
     db.refresh(topic)
+    fanout_buffer.add(topic)
     cache.clear_prefix("square:feed:")
     return get_topic(db, user, topic.id)
 
@@ -96,21 +213,27 @@ def toggle_reaction(db: Session, user: models.User, target_type: str, target_id:
     count_field = "like_count" if reaction_type == "like" else "favorite_count"
     if active:
         db.add(models.SquareReaction(user_id=user.id, target_type=target_type, target_id=target_id, reaction_type=reaction_type))
-        setattr(target, count_field, getattr(target, count_field) + 1)
     else:
         db.delete(reaction)
-        setattr(target, count_field, max(0, getattr(target, count_field) - 1))
+    if reaction_type == "like":
+        user_stats.bump(db, user.id, like_count=1 if active else -1)
     db.commit()
-    return {"id": target_id, "active": active}
+    reaction_cache.update(user.id, target_type, reaction_type, target_id, active)
+    counter_buffer.add(type(target), target_id, count_field, 1 if active else -1)
+    return {
+        "id": target_id,
+        "active": active,
+        "likeCount": counter_buffer.current(target, "like_count"),
+        "favoriteCount": counter_buffer.current(target, "favorite_count"),
+    }
 
 
 def increase_share(db: Session, topic_id: int) -> dict:
     topic = db.get(models.SquareTopic, topic_id)
     if topic is None:
         raise BusinessError("内容不存在", code=40403, status_code=404)
-    topic.share_count += 1
-    db.commit()
-    return {"id": topic_id, "shareCount": topic.share_count}
+    counter_buffer.add(models.SquareTopic, topic_id, "share_count", 1)
+    return {"id": topic_id, "shareCount": counter_buffer.current(topic, "share_count")}
 
 
 def create_comment(db: Session, user: models.User, topic_id: int, data: SquareCommentCreate) -> dict:
@@ -119,14 +242,20 @@ def create_comment(db: Session, user: models.User, topic_id: int, data: SquareCo
         raise BusinessError("内容不存在", code=40403, status_code=404)
     comment = models.SquareComment(topic_id=topic_id, user_id=user.id, content=data.content)
     db.add(comment)
+    db.execute(
+        update(models.SquareTopic)
+        .where(models.SquareTopic.id == topic_id)
+        .values(comment_count=models.SquareTopic.comment_count + 1, hot_score=hot_score_plus(HOT_WEIGHTS["comment_count"]))
+    )
     db.commit()
+    cache.clear_prefix("square:feed:")
     return get_topic(db, user, topic_id)
 
 
 def list_my_topics(db: Session, user: models.User, page: int, page_size: int) -> dict:
     stmt = (
         select(models.SquareTopic)
-        .options(selectinload(models.SquareTopic.author), selectinload(models.SquareTopic.comments))
+        .options(selectinload(models.SquareTopic.author))
         .where(models.SquareTopic.user_id == user.id)
         .order_by(models.SquareTopic.created_at.desc())
     )
@@ -140,8 +269,8 @@ def list_my_topics(db: Session, user: models.User, page: int, page_size: int) ->
             "content": row.content,
             "badge": row.badge,
             "meta": "",
-            "likeCount": row.like_count,
-            "favoriteCount": row.favorite_count,
+            "likeCount": counter_buffer.current(row, "like_count"),
+            "favoriteCount": counter_buffer.current(row, "favorite_count"),
             "targetUrl": f"/pages/square-detail/square-detail?id={row.id}",
         }
         for row in rows
@@ -166,10 +295,24 @@ def list_liked_topics(db: Session, user: models.User, page: int, page_size: int)
             "content": row.content,
             "badge": "获赞",
             "meta": "",
-            "likeCount": row.like_count,
-            "favoriteCount": row.favorite_count,
+            "likeCount": counter_buffer.current(row, "like_count"),
+            "favoriteCount": counter_buffer.current(row, "favorite_count"),
             "targetUrl": f"/pages/square-detail/square-detail?id={row.id}",
         }
         for row in rows
     ]
     return page_dict(items, page, page_size, total)
+
+
+async def list_feed_async(
+    db: AsyncSession,
+    user: models.User | None,
+    page: int,
+    page_size: int,
+    sort: str = "latest",
+    scope: str = "all",
+) -> dict:
+    key = _feed_key(user, page, page_size, sort, scope)
+    if key is None:
+        return await db.run_sync(_load_feed, user, page, page_size, sort, scope)
+    return await cache.aget_or_set(key, lambda: db.run_sync(_load_feed, None, page, page_size, sort, scope), ttl=FEED_CACHE_TTL)
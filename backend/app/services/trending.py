@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import bindparam, case, select
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.db import models
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# 热度 = 各项互动按权重累加，新话题自带 HOT_BASE_SCORE，整体按半衰期指数衰减。
+HOT_BASE_SCORE = 1.0
+HOT_WEIGHTS = {
+    "like_count": 1.0,
+    "favorite_count": 2.0,
+    "comment_count": 2.0,
+    "share_count": 3.0,
+}
+# 衰减到该值以下直接归零，避免长尾话题在每轮衰减里反复被改写。
+HOT_SCORE_FLOOR = 0.01
+
+
+def hot_score_plus(delta: Any) -> Any:
+    column = models.SquareTopic.__table__.c.hot_score
+    return case((column + delta < 0, 0.0), else_=column + delta)
+
+
+def decay_factor(elapsed_seconds: float, half_life_hours: float) -> float:
+    return 0.5 ** (elapsed_seconds / (half_life_hours * 3600))
+
+
+def hot_score_for(counts: Mapping[str, int | None], age_seconds: float, half_life_hours: float = settings.hot_half_life_hours) -> float:
+    # 按计数和发布时长算出一个话题当前的热度，重算和种子数据共用这一个公式。
+    raw = HOT_BASE_SCORE + sum(weight * (counts.get(field) or 0) for field, weight in HOT_WEIGHTS.items())
+    score = raw * decay_factor(max(0.0, age_seconds), half_life_hours)
+    return score if score >= HOT_SCORE_FLOOR else 0.0
+
+
+def decay_hot_scores(conn: Connection, factor: float) -> int:
+    table = models.SquareTopic.__table__
+    column = table.c.hot_score
+    stmt = (
+        table.update()
+        .where(column > 0)
+        .values(hot_score=case((column * factor < HOT_SCORE_FLOOR, 0.0), else_=column * factor), updated_at=table.c.updated_at)
+    )
+    return conn.execute(stmt).rowcount
+
+
+def rebuild_hot_scores(conn: Connection, half_life_hours: float = settings.hot_half_life_hours) -> int:
+    # 按当前计数和发布时间重算全部热度，用于旧库补列和手动修复。
+    table = models.SquareTopic.__table__
+    now = datetime.now()
+    rows = conn.execute(select(table.c.id, table.c.created_at, *(table.c[field] for field in HOT_WEIGHTS))).all()
+    params = []
+    for row in rows:
+        score = hot_score_for(row._mapping, (now - row.created_at).total_seconds(), half_life_hours)
+        params.append({"row_id": row.id, "score": score})
+    if params:
+        conn.execute(
+            table.update().where(table.c.id == bindparam("row_id")).values(hot_score=bindparam("score"), updated_at=table.c.updated_at),
+            params,
+        )
+    return len(params)
+
+
+class HotScoreDecayer:
+    # 后台线程按固定间隔把所有话题热度乘以衰减系数；系数按距上次衰减的实际时长计算，间隔抖动不影响结果。
+    def __init__(self, interval: float, half_life_hours: float) -> None:
+        self.interval = interval
+        self.half_life_hours = half_life_hours
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_run = time.monotonic()
+        self._runs = 0
+        self._last_rows = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._last_run = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="hot-score-decay", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("hot score decay failed")
+
+    def run_once(self, elapsed_seconds: float | None = None) -> int:
+        now = time.monotonic()
+        if elapsed_seconds is None:
+            elapsed_seconds = now - self._last_run
+        self._last_run = now
+        with engine.begin() as conn:
+            self._last_rows = decay_hot_scores(conn, decay_factor(elapsed_seconds, self.half_life_hours))
+        self._runs += 1
+        return self._last_rows
+
+    def stats(self) -> dict[str, Any]:
+        return {"running": self.running, "runs": self._runs, "last_rows": self._last_rows}
+
+
+hot_score_decayer = HotScoreDecayer(settings.hot_decay_interval_s, settings.hot_half_life_hours)
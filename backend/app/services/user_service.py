@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.security import create_access_token
 from app.db import models
 from app.schemas.user import UserUpdate
+from app.services import follow_service, user_stats
 from app.services.serializers import user_detail
 
 
@@ -54,20 +55,13 @@ def update_user(db: Session, user: models.User, data: UserUpdate) -> dict:
 
 
 def get_user_stats(db: Session, user_id: int) -> dict[str, int]:
-    poems = db.scalar(select(func.count()).select_from(models.SquareTopic).where(models.SquareTopic.user_id == user_id)) or 0
-    likes = db.scalar(
-        select(func.count()).select_from(models.SquareReaction).where(
-            models.SquareReaction.user_id == user_id,
-            models.SquareReaction.reaction_type == "like",
-        )
-    ) or 0
-    favorites = db.scalar(select(func.count()).select_from(models.Favorite).where(models.Favorite.user_id == user_id)) or 0
-    follows = db.scalar(select(func.count()).select_from(models.UserFollow).where(models.UserFollow.user_id == user_id)) or 0
+    stats = user_stats.get_stats(db, user_id)
     return {
-        "poem_count": poems,
-        "like_count": likes,
-        "favorite_count": favorites,
-        "following_count": follows,
+        "poem_count": stats["topic_count"],
+        "like_count": stats["like_count"],
+        "favorite_count": stats["favorite_count"],
+        "following_count": stats["following_count"],
+        "follower_count": stats["follower_count"],
     }
 
 
@@ -80,6 +74,7 @@ def get_overview(db: Session, user: models.User) -> dict:
             "likes": stats["like_count"],
             "favorites": stats["favorite_count"],
             "follows": stats["following_count"],
+            "followers": stats["follower_count"],
         },
     }
 
@@ -94,11 +89,7 @@ def get_profile_items(db: Session, user: models.User, item_type: str, page: int,
     if item_type == "likes":
         return list_liked_topics(db, user, page, page_size)
     if item_type == "follows":
-        follows = db.scalars(
-            select(models.UserFollow).where(models.UserFollow.user_id == user.id).offset((page - 1) * page_size).limit(page_size)
-        ).all()
-        total = db.scalar(select(func.count()).select_from(models.UserFollow).where(models.UserFollow.user_id == user.id)) or 0
-        users = [db.get(models.User, follow.target_user_id) for follow in follows]
+        follows, total = follow_service.following_page(db, user, page, page_size)
         items = [
             {
                 "id": target.id,
@@ -107,11 +98,10 @@ def get_profile_items(db: Session, user: models.User, item_type: str, page: int,
                 "subtitle": target.title,
                 "content": target.bio,
                 "badge": "关注",
-                "meta": "已关注",
+                "meta": "互相关注" if mutual else "已关注",
                 "avatarText": target.avatar_text,
             }
-            for target in users
-            if target is not None
+            for target, mutual in follows
         ]
         return page_dict(items, page, page_size, total)
     return list_my_topics(db, user, page, page_size)
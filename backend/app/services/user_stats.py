@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from sqlalchemy import bindparam, case, func, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+STAT_FIELDS = ("topic_count", "like_count", "favorite_count", "following_count", "follower_count")
+
+
+def apply_deltas(db: Session, field: str, deltas: dict[int, int]) -> None:
+    # 在调用方的事务里按用户 upsert 增量；没有统计行的用户先插入，计数不会减到 0 以下。
+    params = [{"row_user_id": user_id, "delta": delta, "initial": max(delta, 0)} for user_id, delta in deltas.items() if delta]
+    if not params:
+        return
+    table = models.UserStats.__table__
+    column = table.c[field]
+    stmt = sqlite_insert(table).values(user_id=bindparam("row_user_id"), **{field: bindparam("initial")})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={field: case((column + bindparam("delta") < 0, 0), else_=column + bindparam("delta"))},
+    )
+    db.execute(stmt, params)
+
+
+def bump(db: Session, user_id: int, **deltas: int) -> None:
+    for field, delta in deltas.items():
+        apply_deltas(db, field, {user_id: delta})
+
+
+def subtract_grouped(db: Session, field: str, model: type[models.Base], *criteria: Any) -> None:
+    # 后台批量删除关系前调用：按用户汇总将被删除的行数，再一次性扣减。
+    rows = db.execute(select(model.user_id, func.count()).where(*criteria).group_by(model.user_id)).all()
+    apply_deltas(db, field, {user_id: -count for user_id, count in rows})
+
+
+def _source_counts() -> dict[str, Any]:
+    user_id = models.User.id
+    return {
+        "topic_count": select(func.count()).where(models.SquareTopic.user_id == user_id).scalar_subquery(),
+        "like_count": select(func.count())
+        .where(models.SquareReaction.user_id == user_id, models.SquareReaction.reaction_type == "like")
+        .scalar_subquery(),
+        "favorite_count": select(func.count()).where(models.Favorite.user_id == user_id).scalar_subquery(),
+        "following_count": select(func.count()).where(models.UserFollow.user_id == user_id).scalar_subquery(),
+        "follower_count": select(func.count()).where(models.UserFollow.target_user_id == user_id).scalar_subquery(),
+    }
+
+
+def recompute(db: Session, user_ids: Iterable[int] | None = None) -> int:
+    # 从源表重算统计，用于首次建表、导入数据后和手动修复。
+    table = models.UserStats.__table__
+    counts = _source_counts()
+    # WHERE 不可省略：SQLite 解析 INSERT ... SELECT ... ON CONFLICT 时需要它消除歧义。
+    source = select(models.User.id, *counts.values()).where(true())
+    if user_ids is not None:
+        source = source.where(models.User.id.in_(set(user_ids)))
+    stmt = sqlite_insert(table).from_select(["user_id", *counts], source)
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.user_id], set_={field: stmt.excluded[field] for field in counts})
+    return db.execute(stmt).rowcount
+
+
+def get_stats(db: Session, user_id: int) -> dict[str, int]:
+    row = db.get(models.UserStats, user_id)
+    return {field: getattr(row, field) if row is not None else 0 for field in STAT_FIELDS}
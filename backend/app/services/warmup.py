@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.http_cache import encode_cached
+from app.services import feihualing_service, poem_service
+
+logger = logging.getLogger(__name__)
+
+state = {"ready": False}
+
+
+def is_ready() -> bool:
+    return state["ready"]
+
+
+def mark_ready() -> None:
+    state["ready"] = True
+
+
+def _timed(timings: dict[str, float], name: str, fn: Callable[[], Any]) -> None:
+    started = time.perf_counter()
+    try:
+        fn()
+    except Exception:
+        logger.exception("cache warm-up: %s failed", name)
+        return
+    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    logger.info("cache warm-up: %s in %.2f ms", name, timings[name])
+
+
+def _warm_poem_details(db: Session, top_n: int) -> None:
+    for poem in db.scalars(poem_service.hot_poems_select().limit(top_n)).all():
+        encode_cached(poem_service.get_poem_detail(db, poem.id, None))
+
+
+def warm_caches(db: Session, top_n: int = 20) -> dict[str, float]:
+    # 预先计算匿名访问的首页、分类、飞花令关键词和热门诗词详情，部署后的第一批请求不再打到冷缓存。
+    timings: dict[str, float] = {}
+    _timed(timings, "home", lambda: encode_cached(poem_service.home_data(db, None)))
+    _timed(timings, "categories", lambda: encode_cached(poem_service.list_categories(db)))
+    _timed(timings, "keywords", lambda: encode_cached(feihualing_service.keywords(db)))
+    _timed(timings, f"poem_details[{top_n}]", lambda: _warm_poem_details(db, top_n))
+    logger.info("cache warm-up finished in %.2f ms", sum(timings.values()))
+    mark_ready()
+    return timings
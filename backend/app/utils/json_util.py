@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from typing import Any
 
 
-def parse_json_list(value: str | None) -> list[Any]:
-    if not value:
-        return []
+# 广场内容的 tags/images 仍是 JSON 文本，同一个字符串只解析一次；返回副本，调用方修改不会污染缓存。
+@lru_cache(maxsize=4096)
+def _parse_json_tuple(value: str) -> tuple[Any, ...]:
     try:
         data = json.loads(value)
     except json.JSONDecodeError:
+        return ()
+    return tuple(data) if isinstance(data, list) else ()
+
+
+def parse_json_list(value: str | None) -> list[Any]:
+    if not value:
         return []
-    return data if isinstance(data, list) else []
+    return list(_parse_json_tuple(value))
 
 
 def dump_json_list(value: list[Any] | None) -> str:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import base64
 from collections.abc import Sequence
+from datetime import datetime
 from typing import Any
 
 from sqlalchemy import func, select
@@ -28,6 +30,22 @@ def page_dict(items: Sequence[Any], page: int, page_size: int, total: int) -> di
 def paginate_select(db: Session, stmt: Any, page: int = 1, page_size: int = 10) -> tuple[list[Any], int, int, int]:
     page = clamp_page(page)
     page_size = clamp_page_size(page_size)
-    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
+    # 计数不需要排序，去掉 ORDER BY 免得 SQLite 在子查询里临时排序。
+    total = db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())) or 0
     rows = db.scalars(stmt.offset((page - 1) * page_size).limit(page_size)).all()
     return rows, page, page_size, total
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    # 游标格式错误时抛 ValueError，由调用方转换为业务错误。
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (UnicodeDecodeError, ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from app.core.cache import LocalCache, anonymous_list_key
+from app.core.config import settings
+
+
+def test_get_or_set_coalesces_concurrent_loaders():
+    local = LocalCache()
+    calls = []
+    results = []
+
+    def loader() -> dict:
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 1}
+
+    threads = [threading.Thread(target=lambda: results.append(local.get_or_set("home", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 8
+    assert local.stats()["coalesced"] == 7
+
+
+def test_get_or_set_waiter_falls_back_after_timeout():
+    local = LocalCache(flight_timeout=0.05)
+    release = threading.Event()
+
+    def slow_loader() -> str:
+        release.wait(1)
+        return "slow"
+
+    leader = threading.Thread(target=lambda: local.get_or_set("key", slow_loader))
+    leader.start()
+    time.sleep(0.02)
+    assert local.get_or_set("key", lambda: "fallback") == "fallback"
+    release.set()
+    leader.join()
+    assert local.stats()["timeouts"] == 1
+
+
+def test_get_or_set_skips_store_when_invalidated_mid_flight():
+    local = LocalCache()
+
+    def loader() -> str:
+        local.clear_prefix("category:")
+        return "stale"
+
+    assert local.get_or_set("category:list", loader) == "stale"
+    assert local.get("category:list") is None
+
+
+def test_aget_or_set_coalesces_coroutines_without_blocking_the_loop():
+    local = LocalCache()
+    calls = []
+
+    async def loader() -> dict:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"value": 1}
+
+    async def run() -> list:
+        return await asyncio.gather(*(local.aget_or_set("poem:detail:1", loader) for _ in range(20)), asyncio.sleep(0.01))
+
+    results = asyncio.run(run())[:-1]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert local.stats()["coalesced"] == 19
+    assert local.stats()["inflight"] == 0
+
+
+def test_aget_or_set_waiters_survive_a_cancelled_leader():
+    local = LocalCache()
+    calls = []
+
+    async def loader() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def run() -> list:
+        leader = asyncio.create_task(local.aget_or_set("key", loader))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(local.aget_or_set("key", loader)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert len(calls) == 2
+    assert local.stats()["inflight"] == 0
+
+
+def test_aget_or_set_waiter_falls_back_after_timeout():
+    local = LocalCache(flight_timeout=0.05)
+
+    async def slow_loader() -> str:
+        await asyncio.sleep(0.2)
+        return "slow"
+
+    async def fallback() -> str:
+        return "fallback"
+
+    async def run() -> list:
+        leader = asyncio.create_task(local.aget_or_set("key", slow_loader))
+        await asyncio.sleep(0.01)
+        return [await local.aget_or_set("key", fallback), await leader]
+
+    assert asyncio.run(run()) == ["fallback", "slow"]
+    assert local.stats()["timeouts"] == 1
+
+
+def test_stale_entry_is_served_while_refreshing_in_background():
+    local = LocalCache()
+    local.set("home:data:shared", "old", ttl=60, stale_ttl=0)
+    refreshed = threading.Event()
+
+    def refresh() -> str:
+        refreshed.set()
+        return "new"
+
+    assert local.get_or_set("home:data:shared", lambda: "sync", ttl=60, stale_ttl=30, refresh=refresh) == "old"
+    assert refreshed.wait(1)
+    for _ in range(50):
+        if local.get("home:data:shared") == "new":
+            break
+        time.sleep(0.01)
+    assert local.get("home:data:shared") == "new"
+    assert local.stats()["refreshes"] == 1
+
+
+def test_local_cache_evicts_least_recently_used_entries():
+    local = LocalCache(max_entries=2)
+    local.set("a", 1)
+    local.set("b", 2)
+    assert local.get("a") == 1
+    local.set("c", 3)
+    assert local.get("b") is None
+    assert (local.get("a"), local.get("c")) == (1, 3)
+    assert local.stats()["size"] == 2
+    assert local.stats()["evictions"] == 1
+
+
+def test_encode_cached_reuses_bytes_for_the_same_payload():
+    from app.core.cache import cache
+    from app.core.http_cache import encode_cached
+
+    payload = {"items": ["花", "月"]}
+    cache.set("test:encoded", payload)
+    first = encode_cached(payload)
+    assert first is encode_cached(payload)
+    assert first.content == '{"code":0,"message":"success","data":{"items":["花","月"]}}'.encode()
+    assert encode_cached({"items": ["花", "月"]}) is not first
+
+    # 编码结果挂在原条目上：反复重算、失效不会留下额外的缓存条目。
+    size = cache.stats()["size"]
+    for _ in range(50):
+        payload = {"items": ["花", "月"]}
+        cache.set("test:encoded", payload)
+        encode_cached(payload)
+        cache.delete("test:encoded")
+    assert cache.stats()["size"] == size - 1
+    assert encode_cached(payload) is not encode_cached(payload)
+
+
+def test_reaction_cache_is_write_through_and_lru_bounded(tmp_path):
+    from sqlalchemy.orm import Session
+
+    from app.db.models import Base
+    from app.db.session import make_engine
+    from app.services.reaction_cache import ReactionCache
+
+    # 用临时库建表，不依赖 data/app.db 是否已由其他测试创建。
+    engine = make_engine(f"sqlite:///{tmp_path / 'reactions.db'}")
+    Base.metadata.create_all(engine)
+    reactions = ReactionCache(max_users=1)
+    with Session(engine) as db:
+        assert reactions.members(db, -1, "poem", "favorite", [1, 2]) == set()
+        reactions.update(-1, "poem", "favorite", 2, True)
+        assert reactions.members(db, -1, "poem", "favorite", [1, 2]) == {2}
+        reactions.update(-1, "poem", "favorite", 2, False)
+        assert reactions.members(db, -1, "poem", "favorite", [1, 2]) == set()
+
+        reactions.members(db, -2, "topic", "like", [1])
+        assert reactions.stats()["users"] == 1
+        reactions.update(-1, "poem", "favorite", 3, True)
+        assert reactions.members(db, -1, "poem", "favorite", [3]) == set()
+
+
+def test_membership_cache_remembers_oversized_users_and_scopes_load_races():
+    from app.core.membership_cache import MembershipCache
+
+    class Fake(MembershipCache):
+        loads: list[int] = []
+        during_load = None
+
+        def _load(self, db, user_id, limit):
+            self.loads.append(limit)
+            if self.during_load is not None:
+                self.during_load()
+            return {"ids": set(range(min(user_id, limit)))}
+
+    fake = Fake(max_users=10, max_members=3)
+    for _ in range(5):
+        assert fake._entry(None, 100) is None
+    assert fake.loads == [4]
+    assert fake.stats()["oversized"] == 1
+
+    # 其他用户的写入不影响本次加载落缓存；同一用户的写入会让本次结果只用一次。
+    fake.during_load = lambda: fake._touch(99)
+    assert fake._entry(None, 2) == {"ids": {0, 1}}
+    fake.during_load = lambda: fake._touch(1)
+    assert fake._entry(None, 1) == {"ids": {0}}
+    fake.during_load = None
+    assert set(fake._users) == {100, 2}
+
+
+def test_anonymous_list_key_covers_first_pages_only():
+    assert anonymous_list_key("poem:list", None, 1, 10, "唐诗") == "poem:list:唐诗:1:10"
+    assert anonymous_list_key("poem:list", None, 0, 500) == "poem:list:1:100"
+    assert anonymous_list_key("poem:list", None, settings.anon_list_cache_pages + 1, 10) is None
+    assert anonymous_list_key("poem:list", object(), 1, 10) is None
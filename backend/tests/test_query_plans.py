@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app.core.cache import cache
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.main import app
+from app.services import feihualing_service, follow_service, poem_service, square_service, user_service
+from app.services.follow_service import follow_cache
+from app.services.reaction_cache import reaction_cache
+from app.utils.pagination import encode_cursor
+
+# 按标签、分类、作者筛选的热门诗词先走筛选条件的索引取出匹配行，再只对这部分行排序；
+# 只放行这一步，语句里其余步骤照常检查，不带筛选的热门列表必须按 ix_poem_totals_hot 顺序读取。
+FILTERED_HOT_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def capture_selects(run) -> list[tuple[str, tuple]]:
+    captured: list[tuple[str, tuple]] = []
+
+    def grab(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", grab)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", grab)
+    return captured
+
+
+def query_plan(statement: str, parameters: tuple) -> list[str]:
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+def is_hot_poem_list(statement: str, filtered: bool) -> bool:
+    statement = " ".join(statement.split())
+    return "ORDER BY poem_totals.like_count DESC" in statement and (" WHERE " in statement) == filtered
+
+
+def allowed_steps(statement: str) -> set[str]:
+    if is_hot_poem_list(statement, filtered=True):
+        return {FILTERED_HOT_SORT}
+    return set()
+
+
+def plan_problems(statement: str, parameters: tuple) -> list[str]:
+    tables = set(models.Base.metadata.tables)
+    plan = query_plan(statement, parameters)
+    allowed = allowed_steps(statement)
+    problems = []
+    for step in plan:
+        if step in allowed:
+            continue
+        words = step.split()
+        if words[0] == "SCAN" and words[1] in tables and "USING" not in step:
+            problems.append(step)
+        if "TEMP B-TREE" in step or "AUTOMATIC" in step:
+            problems.append(step)
+    return problems
+
+
+def test_hot_queries_use_indexes(monkeypatch):
+    monkeypatch.setattr(reaction_cache, "max_users", 0)
+    monkeypatch.setattr(follow_cache, "max_users", 0)
+    with TestClient(app), SessionLocal() as db:
+        cache.clear_prefix("")
+        user = db.scalar(select(models.User).limit(1))
+        category_id = db.scalar(select(models.Category.id).limit(1))
+        topic_id = db.scalar(select(models.SquareTopic.id).limit(1))
+        room_id = db.scalar(select(models.FeihualingRoom.id).limit(1))
+
+        def run() -> None:
+            poem_service.list_poems(db, user, 1, 10)
+            poem_service.list_poems(db, user, 1, 10, tag="唐诗")
+            poem_service.get_poem_detail(db, 1, user)
+            poem_service.home_data(db, user)
+            poem_service.list_categories(db)
+            poem_service.list_category_poems(db, category_id, user, 1, 10)
+            poem_service.list_favorites(db, user, 1, 10)
+            poem_service.list_history(db, user, 1, 10)
+            square_service.list_feed(db, user, 1, 10)
+            square_service.list_feed(db, user, 3, 10, sort="hot")
+            square_service.list_feed(db, user, 1, 10, scope="following")
+            square_service.get_topic(db, user, topic_id)
+            square_service.list_comments(db, user, topic_id, encode_cursor(datetime.now(), 1), 10)
+            square_service.list_my_topics(db, user, 1, 10)
+            feihualing_service.list_records(db, user, 1, 10)
+            feihualing_service.list_rooms(db)
+            feihualing_service.get_room(db, room_id)
+            user_service.get_user_stats(db, user.id)
+            follow_service.list_follows(db, user.id, "following", encode_cursor(datetime.now(), 1), 10)
+            follow_service.list_follows(db, user.id, "followers", None, 10)
+            follow_service.following_page(db, user, 2, 10)
+
+        statements = capture_selects(run)
+
+    assert statements
+    failures = {}
+    for statement, parameters in statements:
+        problems = plan_problems(statement, parameters)
+        if problems:
+            failures[" ".join(statement.split())[:160]] = problems
+    assert failures == {}
+
+    hot = [(statement, parameters) for statement, parameters in statements if is_hot_poem_list(statement, filtered=False)]
+    assert hot
+    for statement, parameters in hot:
+        assert "SCAN poem_totals USING COVERING INDEX ix_poem_totals_hot" in query_plan(statement, parameters)
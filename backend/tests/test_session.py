@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+
+from app.db import models, session
+from app.db.session import ReadSessionLocal, make_engine, pragma_report
+from app.main import app
+
+
+def test_performance_profile_applies_pragmas_on_connect(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'profile.db'}", "performance")
+    report = pragma_report(engine)
+    assert report["journal_mode"] == "wal"
+    assert report["synchronous"] == 1
+    assert report["temp_store"] == 2
+    assert report["busy_timeout"] > 0
+    engine.dispose()
+
+    engine = make_engine(f"sqlite:///{tmp_path / 'plain.db'}", "default")
+    assert pragma_report(engine)["journal_mode"] == "delete"
+    engine.dispose()
+
+
+def test_read_sessions_are_read_only_and_routable(monkeypatch):
+    with TestClient(app):
+        pass
+    with ReadSessionLocal() as db:
+        assert db.scalar(select(models.Poem.id).limit(1)) is not None
+        with pytest.raises(OperationalError):
+            db.execute(update(models.Category).values(sort_order=models.Category.sort_order))
+
+    monkeypatch.setattr(session, "settings", replace(session.settings, read_db_primary_routes=frozenset({"poem_detail"})))
+    for name, bind in (("poem_detail", session.engine), ("get_home", session.read_engine)):
+        request = Request({"type": "http", "route": SimpleNamespace(name=name)})
+        dependency = session.get_read_db(request)
+        assert next(dependency).get_bind() is bind
+        dependency.close()
+
+
+def test_read_routes_do_not_open_primary_sessions():
+    from fastapi.routing import APIRoute
+
+    def endpoints(routes) -> list[APIRoute]:
+        # app.routes 里 include_router 的结果是嵌套路由对象，逐层展开到具体的 APIRoute。
+        found = []
+        for route in routes:
+            if isinstance(route, APIRoute):
+                found.append(route)
+            elif hasattr(route, "original_router"):
+                found.extend(endpoints(route.original_router.routes))
+            elif hasattr(route, "routes"):
+                found.extend(endpoints(route.routes))
+        return found
+
+    def calls(dependant) -> set:
+        found = set()
+        for sub in dependant.dependencies:
+            found.add(sub.call)
+            found |= calls(sub)
+        return found
+
+    reads, offenders = 0, []
+    for route in endpoints(app.routes):
+        if "GET" not in route.methods:
+            continue
+        used = calls(route.dependant)
+        if session.get_read_db in used:
+            reads += 1
+            if session.get_db in used:
+                offenders.append(route.name)
+    assert reads > 10
+    assert offenders == []
+
+
+def test_relative_sqlite_urls_resolve_against_backend_dir(tmp_path, monkeypatch):
+    from app.core.config import default_read_url, normalize_database_url
+
+    monkeypatch.chdir(tmp_path)
+    backend_dir = session.settings.backend_dir
+    url = normalize_database_url("sqlite:///./data/app.db", backend_dir)
+    assert url == f"sqlite:///{(backend_dir / 'data' / 'app.db').as_posix()}"
+    assert default_read_url(url) == f"sqlite:///file:{(backend_dir / 'data' / 'app.db').as_posix()}?mode=ro&uri=true"
+    assert normalize_database_url("sqlite:///:memory:", backend_dir) == "sqlite:///:memory:"
+    assert default_read_url("postgresql://db/app") == ""
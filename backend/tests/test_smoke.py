@@ -1,10 +1,15 @@
 from fastapi.testclient import TestClient
-from sqlalchemy import func, select
+from sqlalchemy import event, func, select
 from uuid import uuid4
 
+from app.core.cache import anonymous_list_key, cache
 from app.db import models
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, async_read_engine, engine, read_engine
 from app.main import app
+from app.services import user_stats
+from app.services.counters import counter_buffer
+from app.services.feed_inbox import fanout_buffer
+from app.services.trending import HOT_BASE_SCORE, HOT_WEIGHTS, decay_factor, decay_hot_scores, hot_score_for
 
 
 def login_headers(client: TestClient) -> dict[str, str]:
@@ -33,6 +38,7 @@ def test_health_home_and_login_flow():
         health = client.get("/api/v1/health")
         assert health.status_code == 200
         assert health.json()["data"]["status"] == "ok"
+        assert client.get("/api/v1/health/ready").status_code == 200
 
         home = client.get("/api/v1/home")
         assert home.status_code == 200
@@ -248,3 +254,337 @@ def test_admin_console_core_flow():
         deleted = client.delete(f"/api/v1/admin/poems/{poem_id}", headers=headers)
         assert deleted.status_code == 200
         assert deleted.json()["data"]["deleted"] is True
+
+
+def test_poem_detail_shares_payload_across_viewers():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        client.post("/api/v1/favorites/2", headers=headers)
+
+        mine = client.get("/api/v1/poems/2", headers=headers).json()["data"]
+        anonymous = client.get("/api/v1/poems/2").json()["data"]
+        assert mine["is_favorite"] is True
+        assert anonymous["is_favorite"] is False
+        assert mine["content"] == anonymous["content"]
+
+        home = client.get("/api/v1/home", headers=headers).json()["data"]
+        assert all(item["is_favorite"] == (item["id"] == 2) for item in home["recommend_poems"])
+        assert all(item["is_favorite"] is False for item in client.get("/api/v1/home").json()["data"]["recommend_poems"])
+
+
+def test_read_endpoints_answer_conditional_get_with_304():
+    with TestClient(app) as client:
+        for path in ("/api/v1/home", "/api/v1/categories", "/api/v1/poems/1", "/api/v1/feihualing/keywords"):
+            first = client.get(path)
+            assert first.status_code == 200
+            etag = first.headers["etag"]
+            assert first.headers["cache-control"]
+
+            again = client.get(path, headers={"If-None-Match": etag})
+            assert again.status_code == 304
+            assert again.content == b""
+            assert again.headers["etag"] == etag
+
+        categories = client.get("/api/v1/categories").json()["data"]["items"]
+        category_path = f"/api/v1/categories/{categories[0]['id']}/poems"
+        etag = client.get(category_path).headers["etag"]
+        assert client.get(category_path, headers={"If-None-Match": f'"other", {etag}'}).status_code == 304
+        assert client.get(category_path, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_reaction_sync_applies_batch_and_returns_changed_counts():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic_id = client.get("/api/v1/square/feed").json()["data"]["items"][0]["id"]
+        before = client.get("/api/v1/poems/3").json()["data"]["like_count"]
+
+        operations = [
+            {"target_type": "poem", "target_id": 3, "reaction_type": "like", "active": True},
+            {"target_type": "poem", "target_id": 3, "reaction_type": "like", "active": False},
+            {"target_type": "poem", "target_id": 3, "reaction_type": "like", "active": True},
+            {"target_type": "topic", "target_id": topic_id, "reaction_type": "favorite", "active": True},
+            {"target_type": "topic", "target_id": 99999999, "reaction_type": "like", "active": True},
+        ]
+        response = client.post("/api/v1/reactions/sync", json={"operations": operations}, headers=headers)
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["applied"] == 2
+        assert data["skipped"] == 1
+        changed = {(item["target_type"], item["target_id"]): item for item in data["changed"]}
+        assert set(changed) == {("poem", 3), ("topic", topic_id)}
+        assert changed[("poem", 3)]["like_count"] == before + 1
+        assert client.get("/api/v1/poems/3", headers=headers).json()["data"]["is_liked"] is True
+        assert client.get(f"/api/v1/square/feed/{topic_id}", headers=headers).json()["data"]["isFavorited"] is True
+
+        again = client.post("/api/v1/reactions/sync", json={"operations": operations}, headers=headers).json()["data"]
+        assert again["applied"] == 0
+        assert again["changed"] == []
+        assert client.post("/api/v1/reactions/sync", json={"operations": []}, headers=headers).status_code == 422
+
+
+def test_reaction_sync_tolerates_rows_written_after_its_snapshot(monkeypatch):
+    from app.services import reaction_service
+
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        client.post("/api/v1/favorites/4", headers=headers)
+        counter_buffer.flush()
+        before = client.get("/api/v1/poems/4").json()["data"]["favorite_count"]
+
+        # 模拟单条接口在批量同步读快照之后抢先写入：快照里看不到这条收藏。
+        monkeypatch.setattr(reaction_service, "_current_reactions", lambda db, user, wanted: set())
+        operations = [{"target_type": "poem", "target_id": 4, "reaction_type": "favorite", "active": True}]
+        response = client.post("/api/v1/reactions/sync", json={"operations": operations}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["data"]["applied"] == 0
+        assert client.get("/api/v1/poems/4").json()["data"]["favorite_count"] == before
+        assert client.get("/api/v1/users/me", headers=headers).json()["data"]["favorite_count"] == 1
+
+
+def test_poems_filter_by_tag_uses_poem_tags():
+    with TestClient(app) as client:
+        first = client.get("/api/v1/poems/1").json()["data"]
+        tag = first["tags"][0]
+        items = client.get("/api/v1/poems", params={"tag": tag, "page_size": 100}).json()["data"]["items"]
+        assert any(item["id"] == 1 for item in items)
+        assert all(tag in item["tags"] for item in items)
+        assert client.get("/api/v1/poems", params={"tag": "不存在的标签"}).json()["data"]["total"] == 0
+
+
+def test_feed_embeds_latest_comments_and_keeps_comment_count():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "评论预览测试"}).json()["data"]["id"]
+        for index in range(5):
+            detail = client.post(f"/api/v1/square/feed/{topic_id}/comments", headers=headers, json={"content": f"第{index}条"}).json()["data"]
+        assert detail["commentCount"] == 5
+        assert len(detail["comments"]) == 5
+
+        items = client.get("/api/v1/square/feed", params={"page_size": 50}).json()["data"]["items"]
+        item = next(item for item in items if item["id"] == topic_id)
+        assert item["commentCount"] == 5
+        assert [comment["content"] for comment in item["comments"]] == ["第4条", "第3条", "第2条"]
+
+        comment_id = item["comments"][0]["id"]
+        admin = admin_headers(client)
+        assert client.delete(f"/api/v1/admin/square/comments/{comment_id}", headers=admin).status_code == 200
+        assert client.get(f"/api/v1/square/feed/{topic_id}").json()["data"]["commentCount"] == 4
+
+
+def test_topic_comments_page_by_cursor():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "评论分页测试"}).json()["data"]["id"]
+        for index in range(5):
+            client.post(f"/api/v1/square/feed/{topic_id}/comments", headers=headers, json={"content": f"第{index}条"})
+        first_id = client.get(f"/api/v1/square/feed/{topic_id}").json()["data"]["comments"][0]["id"]
+        client.post(f"/api/v1/square/feed/{topic_id}/comments/{first_id}/like", headers=headers)
+
+        seen: list[str] = []
+        cursor = None
+        while True:
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            data = client.get(f"/api/v1/square/feed/{topic_id}/comments", params=params, headers=headers).json()["data"]
+            seen.extend(item["content"] for item in data["items"])
+            if data["items"] and data["items"][0]["id"] == first_id:
+                assert data["items"][0]["isLiked"] is True
+            cursor = data["next_cursor"]
+            assert data["has_more"] is (cursor is not None)
+            if cursor is None:
+                break
+        assert seen == [f"第{index}条" for index in range(4, -1, -1)]
+
+        assert client.get(f"/api/v1/square/feed/{topic_id}/comments", params={"cursor": "bad"}).status_code == 400
+        assert client.get("/api/v1/square/feed/99999999/comments").status_code == 404
+
+
+def test_square_reactions_return_compact_payload_on_request():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic = client.post("/api/v1/square/feed", headers=headers, json={"content": "精简响应测试"}).json()["data"]
+        comment_id = client.post(f"/api/v1/square/feed/{topic['id']}/comments", headers=headers, json={"content": "评论"}).json()["data"]["comments"][0]["id"]
+
+        liked = client.post(f"/api/v1/square/feed/{topic['id']}/like", params={"compact": True}, headers=headers).json()["data"]
+        assert liked == {"id": topic["id"], "active": True, "likeCount": topic["likeCount"] + 1, "favoriteCount": topic["favoriteCount"]}
+        unliked = client.post(f"/api/v1/square/feed/{topic['id']}/like", params={"compact": True}, headers=headers).json()["data"]
+        assert unliked["active"] is False
+        assert unliked["likeCount"] == topic["likeCount"]
+
+        favorited = client.post(
+            f"/api/v1/square/feed/{topic['id']}/comments/{comment_id}/favorite", params={"compact": True}, headers=headers
+        ).json()["data"]
+        assert favorited == {"id": comment_id, "active": True, "likeCount": 0, "favoriteCount": 1}
+
+        shared = client.post(f"/api/v1/square/feed/{topic['id']}/share", params={"compact": True}).json()["data"]
+        assert set(shared) == {"id", "shareCount"}
+        assert "comments" in client.post(f"/api/v1/square/feed/{topic['id']}/favorite", headers=headers).json()["data"]
+
+
+def test_hot_feed_orders_by_incremental_decayed_score():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "热度排序测试"}).json()["data"]["id"]
+        client.post(f"/api/v1/square/feed/{topic_id}/comments", headers=headers, json={"content": "顶"})
+        client.post(f"/api/v1/square/feed/{topic_id}/like", headers=headers)
+        counter_buffer.flush()
+        expected = HOT_BASE_SCORE + HOT_WEIGHTS["comment_count"] + HOT_WEIGHTS["like_count"]
+        with SessionLocal() as db:
+            assert db.get(models.SquareTopic, topic_id).hot_score == expected
+            ranked = db.scalars(select(models.SquareTopic.id).order_by(models.SquareTopic.hot_score.desc(), models.SquareTopic.id.desc()).limit(100)).all()
+
+        items = client.get("/api/v1/square/feed", params={"sort": "hot", "page_size": 100}).json()["data"]["items"]
+        assert [item["id"] for item in items] == list(ranked)
+        assert client.get("/api/v1/square/feed", params={"sort": "bad"}).status_code == 422
+
+    with engine.connect() as conn:
+        decay_hot_scores(conn, decay_factor(24 * 3600, 24))
+        score = conn.scalar(select(models.SquareTopic.hot_score).where(models.SquareTopic.id == topic_id))
+        conn.rollback()
+    assert score == expected / 2
+    assert hot_score_for({"comment_count": 1, "like_count": 1}, 24 * 3600, 24) == expected / 2
+
+
+def test_following_feed_reads_fanned_out_inbox():
+    with TestClient(app) as client:
+        reader = login_headers(client)
+        author = login_headers(client)
+        author_id = client.get("/api/v1/users/me", headers=author).json()["data"]["id"]
+        earlier = client.post("/api/v1/square/feed", headers=author, json={"content": "关注前发的"}).json()["data"]["id"]
+
+        assert client.post(f"/api/v1/users/{author_id}/follow", headers=reader).json()["data"]["following"] is True
+        later = client.post("/api/v1/square/feed", headers=author, json={"content": "关注后发的"}).json()["data"]["id"]
+        fanout_buffer.flush()
+
+        items = client.get("/api/v1/square/feed", params={"scope": "following"}, headers=reader).json()["data"]["items"]
+        assert [item["id"] for item in items][:2] == [later, earlier]
+        assert client.get("/api/v1/square/feed", params={"scope": "following"}).status_code == 401
+        assert client.get("/api/v1/square/feed", params={"scope": "following", "sort": "hot"}, headers=reader).status_code == 400
+        assert client.post("/api/v1/users/99999999/follow", headers=reader).status_code == 404
+
+        client.delete(f"/api/v1/users/{author_id}/follow", headers=reader)
+        items = client.get("/api/v1/square/feed", params={"scope": "following"}, headers=reader).json()["data"]["items"]
+        assert not {earlier, later} & {item["id"] for item in items}
+
+
+def test_anonymous_list_pages_are_cached_until_a_write():
+    with TestClient(app) as client:
+        cache.clear_prefix("")
+        statements: list[str] = []
+
+        def grab(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(read_engine, "before_cursor_execute", grab)
+        event.listen(async_read_engine.sync_engine, "before_cursor_execute", grab)
+        try:
+            for path in ("/api/v1/poems", "/api/v1/square/feed", "/api/v1/categories/1/poems"):
+                before = len(statements)
+                first = client.get(path).json()["data"]
+                assert len(statements) > before
+                before = len(statements)
+                assert client.get(path).json()["data"] == first
+                assert len(statements) == before
+        finally:
+            event.remove(read_engine, "before_cursor_execute", grab)
+            event.remove(async_read_engine.sync_engine, "before_cursor_execute", grab)
+
+        tag = client.get("/api/v1/poems").json()["data"]["items"][0]["tags"][0]
+        client.get("/api/v1/poems", params={"tag": tag})
+        client.get("/api/v1/poems", params={"tag": "不存在的标签"})
+        assert cache.get(anonymous_list_key("poem:list", None, 1, 10, tag)) is not None
+        assert cache.get(anonymous_list_key("poem:list", None, 1, 10, "不存在的标签")) is None
+
+        headers = login_headers(client)
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "缓存失效测试"}).json()["data"]["id"]
+        assert client.get("/api/v1/square/feed").json()["data"]["items"][0]["id"] == topic_id
+
+
+def test_user_stats_are_maintained_by_write_paths():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        other = login_headers(client)
+        other_id = client.get("/api/v1/users/me", headers=other).json()["data"]["id"]
+
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "统计测试"}).json()["data"]["id"]
+        client.post(f"/api/v1/square/feed/{topic_id}/like", headers=headers)
+        client.post("/api/v1/favorites/2", headers=headers)
+        client.post(
+            "/api/v1/reactions/sync",
+            headers=headers,
+            json={"operations": [{"target_type": "poem", "target_id": 2, "reaction_type": "like", "active": True}]},
+        )
+        client.post(f"/api/v1/users/{other_id}/follow", headers=headers)
+
+        me = client.get("/api/v1/users/me", headers=headers).json()["data"]
+        assert (me["poem_count"], me["like_count"], me["favorite_count"], me["following_count"]) == (1, 2, 1, 1)
+        assert client.get("/api/v1/users/me", headers=other).json()["data"]["follower_count"] == 1
+
+        client.delete(f"/api/v1/users/{other_id}/follow", headers=headers)
+        client.delete("/api/v1/favorites/2", headers=headers)
+        assert client.delete(f"/api/v1/admin/square/topics/{topic_id}", headers=admin_headers(client)).status_code == 200
+        me = client.get("/api/v1/users/me", headers=headers).json()["data"]
+        assert (me["poem_count"], me["like_count"], me["favorite_count"], me["following_count"]) == (0, 1, 0, 0)
+
+    with SessionLocal() as db:
+        snapshot = select(models.UserStats.__table__).order_by(models.UserStats.user_id)
+        before = {row[0]: tuple(row[1:]) for row in db.execute(snapshot)}
+        user_stats.recompute(db)
+        after = {row[0]: tuple(row[1:]) for row in db.execute(snapshot)}
+        db.rollback()
+    zeros = (0,) * len(user_stats.STAT_FIELDS)
+    assert {user_id: before.get(user_id, zeros) for user_id in after} == after
+
+
+def test_follow_lists_page_by_cursor_with_constant_queries():
+    with TestClient(app) as client:
+        owner = login_headers(client)
+        owner_id = client.get("/api/v1/users/me", headers=owner).json()["data"]["id"]
+        fans = [login_headers(client) for _ in range(5)]
+        fan_ids = [client.get("/api/v1/users/me", headers=fan).json()["data"]["id"] for fan in fans]
+        for fan in fans:
+            client.post(f"/api/v1/users/{owner_id}/follow", headers=fan)
+        client.post(f"/api/v1/users/{fan_ids[0]}/follow", headers=owner)
+
+        statements: list[str] = []
+
+        def grab(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(read_engine, "before_cursor_execute", grab)
+        try:
+            seen, cursor, query_counts = [], None, []
+            while True:
+                before = len(statements)
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                data = client.get(f"/api/v1/users/{owner_id}/followers", params=params).json()["data"]
+                query_counts.append(len(statements) - before)
+                seen.extend(data["items"])
+                cursor = data["next_cursor"]
+                if not data["has_more"]:
+                    break
+        finally:
+            event.remove(read_engine, "before_cursor_execute", grab)
+
+        assert [item["id"] for item in seen] == fan_ids[::-1]
+        assert {item["id"] for item in seen if item["mutual"]} == {fan_ids[0]}
+        assert len(set(query_counts[1:])) == 1
+
+        following = client.get(f"/api/v1/users/{owner_id}/following").json()["data"]["items"]
+        assert [(item["id"], item["mutual"]) for item in following] == [(fan_ids[0], True)]
+        items = client.get("/api/v1/users/me/follows", headers=owner).json()["data"]["items"]
+        assert [(item["id"], item["meta"]) for item in items] == [(fan_ids[0], "互相关注")]
+
+        client.delete(f"/api/v1/users/{owner_id}/follow", headers=fans[0])
+        following = client.get(f"/api/v1/users/{owner_id}/following").json()["data"]["items"]
+        assert following[0]["mutual"] is False
+        assert client.get(f"/api/v1/users/{owner_id}/followers", params={"cursor": "bad"}).status_code == 400
+
+
+def test_profile_topic_lists_include_pending_counter_deltas():
+    with TestClient(app) as client:
+        headers = login_headers(client)
+        topic_id = client.post("/api/v1/square/feed", headers=headers, json={"content": "计数叠加测试"}).json()["data"]["id"]
+        client.post(f"/api/v1/square/feed/{topic_id}/like", headers=headers)
+        for item_type in ("posts", "likes"):
+            items = client.get(f"/api/v1/users/me/{item_type}", headers=headers).json()["data"]["items"]
+            assert {item["id"]: item["likeCount"] for item in items}[topic_id] == 1
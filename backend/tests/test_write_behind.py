@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy import delete, func, select
+
+from app.db import models
+from app.db.session import SessionLocal, engine
+from app.services.counters import CounterBuffer
+from app.services.feed_inbox import FeedFanoutBuffer
+from app.services.history_buffer import HistoryBuffer
+
+
+def test_counter_buffer_batches_atomic_increments():
+    buffer = CounterBuffer(interval=60)
+    buffer.start()
+    try:
+        with SessionLocal() as db:
+            poem = db.scalar(select(models.Poem).order_by(models.Poem.id.desc()).limit(1))
+            poem_id, before = poem.id, poem.share_count
+
+        threads = [threading.Thread(target=buffer.add, args=(models.Poem, poem_id, "share_count", 1)) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert buffer.stats()["pending"] == 1
+
+        with SessionLocal() as db:
+            poem = db.get(models.Poem, poem_id)
+            assert poem.share_count == before
+            assert buffer.current(poem, "share_count") == before + 20
+    finally:
+        buffer.stop()
+
+    with SessionLocal() as db:
+        assert db.get(models.Poem, poem_id).share_count == before + 20
+    stats = buffer.stats()
+    assert stats["pending"] == 0
+    assert stats["flushes"] == 1
+    assert stats["flushed"] == 1
+
+
+def test_counter_buffer_never_goes_below_zero():
+    buffer = CounterBuffer(interval=60)
+    with SessionLocal() as db:
+        user_id = db.scalar(select(models.User.id).limit(1))
+        topic = models.SquareTopic(user_id=user_id, title="计数测试", content="计数测试", favorite_count=2)
+        db.add(topic)
+        db.commit()
+        topic_id = topic.id
+    buffer.add(models.SquareTopic, topic_id, "favorite_count", -3)
+    with SessionLocal() as db:
+        topic = db.get(models.SquareTopic, topic_id)
+        assert topic.favorite_count == 0
+        db.delete(topic)
+        db.commit()
+
+
+def test_poem_counters_live_in_poem_stats_without_touching_poem_rows():
+    buffer = CounterBuffer(interval=60)
+    with SessionLocal() as db:
+        poem = db.scalar(select(models.Poem).order_by(models.Poem.id.desc()).limit(1))
+        poem_id, updated_at, likes = poem.id, poem.updated_at, poem.like_count
+
+    buffer.add(models.Poem, poem_id, "like_count", 2)
+    buffer.add(models.Poem, poem_id, "like_count", -1)
+
+    with SessionLocal() as db:
+        poem = db.get(models.Poem, poem_id)
+        assert poem.like_count == likes + 1
+        assert poem.updated_at == updated_at
+        assert db.scalar(select(models.PoemStats.poem_id).where(models.PoemStats.poem_id == poem_id).limit(1)) == poem_id
+    buffer.add(models.Poem, poem_id, "like_count", -1)
+
+
+def test_history_buffer_upserts_latest_view_and_caps_per_user():
+    buffer = HistoryBuffer(interval=60, max_per_user=3)
+    buffer.start()
+    with SessionLocal() as db:
+        user = models.User(openid=f"history-{uuid4().hex}", nickname="历史测试")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        poem_ids = db.scalars(select(models.Poem.id).order_by(models.Poem.id).limit(5)).all()
+    try:
+        start = models.now()
+        for offset, poem_id in enumerate(poem_ids):
+            buffer.add(user_id, poem_id, start + timedelta(seconds=offset))
+        buffer.add(user_id, poem_ids[0], start + timedelta(seconds=10))
+        buffer.add(user_id, poem_ids[0], start - timedelta(seconds=10))
+        assert buffer.stats()["pending"] == 5
+    finally:
+        buffer.stop()
+
+    with SessionLocal() as db:
+        rows = db.scalars(
+            select(models.BrowseHistory).where(models.BrowseHistory.user_id == user_id).order_by(models.BrowseHistory.viewed_at.desc())
+        ).all()
+        assert [row.poem_id for row in rows] == [poem_ids[0], poem_ids[4], poem_ids[3]]
+        db.execute(delete(models.BrowseHistory).where(models.BrowseHistory.user_id == user_id))
+        db.delete(db.get(models.User, user_id))
+        db.commit()
+
+
+def test_fanout_buffer_fills_follower_inboxes_and_caps_them():
+    buffer = FeedFanoutBuffer(interval=60, max_per_user=2)
+    buffer.start()
+    with SessionLocal() as db:
+        author = models.User(openid=f"author-{uuid4().hex}", nickname="作者")
+        followers = [models.User(openid=f"fan-{uuid4().hex}", nickname="粉丝") for _ in range(2)]
+        db.add_all([author, *followers])
+        db.flush()
+        db.add_all([models.UserFollow(user_id=follower.id, target_user_id=author.id) for follower in followers])
+        start = models.now()
+        topics = [
+            models.SquareTopic(user_id=author.id, title=f"分发{index}", content="分发测试", created_at=start + timedelta(seconds=index))
+            for index in range(3)
+        ]
+        db.add_all(topics)
+        db.commit()
+        follower_ids = [follower.id for follower in followers]
+        topic_ids = [topic.id for topic in topics]
+        for topic in topics:
+            buffer.add(topic)
+    buffer.stop()
+
+    with SessionLocal() as db:
+        for follower_id in follower_ids:
+            inbox = db.scalars(
+                select(models.FeedInbox.topic_id).where(models.FeedInbox.user_id == follower_id).order_by(models.FeedInbox.created_at.desc())
+            ).all()
+            assert inbox == [topic_ids[2], topic_ids[1]]
+        db.execute(delete(models.FeedInbox).where(models.FeedInbox.topic_id.in_(topic_ids)))
+        db.execute(delete(models.UserFollow).where(models.UserFollow.user_id.in_(follower_ids)))
+        db.execute(delete(models.SquareTopic).where(models.SquareTopic.id.in_(topic_ids)))
+        db.commit()
+
+
+def test_counter_flush_skips_deleted_poems():
+    from app.services.counters import apply_counter_deltas, counter_buffer
+
+    with SessionLocal() as db:
+        missing = (db.scalar(select(func.max(models.Poem.id))) or 0) + 1000
+    counter_buffer.add(models.Poem, missing, "like_count", 1)
+    counter_buffer.discard(models.Poem, missing)
+    assert (models.Poem.__tablename__, missing, "like_count") not in counter_buffer._pending
+
+    # 即便增量没有被丢弃（例如删除与落库并发），也不会给不存在的诗词写入分片或汇总行。
+    with engine.begin() as conn:
+        apply_counter_deltas(conn, {(models.Poem.__tablename__, missing, "like_count"): 1})
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(models.PoemStats).where(models.PoemStats.poem_id == missing)) == 0
+        assert db.get(models.PoemTotals, missing) is None
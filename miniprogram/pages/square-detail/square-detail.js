@@ -1,5 +1,6 @@
 const {
   getSquareTopic,
+  getSquareComments,
   toggleSquareLike,
   toggleSquareFavorite,
   increaseSquareShare,
@@ -62,15 +63,25 @@ function normalizeTopic(topic) {
     isFavorited: Boolean(source.isFavorited || source.is_favorited),
     likeCount: source.likeCount || source.like_count || 0,
     favoriteCount: source.favoriteCount || source.favorite_count || 0,
-    shareCount: source.shareCount || source.share_count || 0
+    shareCount: source.shareCount || source.share_count || 0,
+    commentCount: source.commentCount || source.comment_count || comments.length
   }
 }
 
+// 接口返回的话题只带第一页评论，已经翻页加载的评论按 id 合并在后面。
+function mergeComments(freshComments, loadedComments) {
+  const ids = freshComments.map((comment) => String(comment.id))
+
+  return freshComments.concat(loadedComments.filter((comment) => ids.indexOf(String(comment.id)) < 0))
+}
+
 Page({
   data: {
     topicId: '',
     topic: null,
     loading: true,
+    commentsNextCursor: null,
+    loadingComments: false,
     commentValue: '',
     sendingComment: false
   },
@@ -102,7 +113,8 @@ Page({
         const normalizedTopic = normalizeTopic(topic)
 
         this.setData({
-          topic: normalizedTopic
+          topic: normalizedTopic,
+          commentsNextCursor: topic.commentsNextCursor || null
         })
         wx.setNavigationBarTitle({ title: '动态详情' })
       })
@@ -119,11 +131,70 @@ Page({
       return
     }
 
+    const normalizedTopic = normalizeTopic(topic)
+    const current = this.data.topic
+
+    if (current) {
+      normalizedTopic.comments = mergeComments(normalizedTopic.comments, current.comments)
+    }
+
     this.setData({
-      topic: normalizeTopic(topic)
+      topic: normalizedTopic,
+      commentsNextCursor: current ? this.data.commentsNextCursor : topic.commentsNextCursor || null
     })
   },
 
+  // 评论不在接口返回的第一页里时，在本地同步点赞/收藏状态。
+  syncLoadedComment(topic, commentId, stateKey, countKey) {
+    if ((topic.comments || []).some((comment) => String(comment.id) === String(commentId))) {
+      return
+    }
+
+    const comments = this.data.topic.comments.map((comment) => {
+      if (String(comment.id) !== String(commentId)) {
+        return comment
+      }
+
+      const active = !comment[stateKey]
+      return Object.assign({}, comment, {
+        [stateKey]: active,
+        [countKey]: Math.max(0, (comment[countKey] || 0) + (active ? 1 : -1))
+      })
+    })
+
+    this.setData({ topic: Object.assign({}, this.data.topic, { comments }) })
+  },
+
+  /**
+   * 滚动到底部时按游标加载下一页评论。
+   */
+  loadMoreComments() {
+    const cursor = this.data.commentsNextCursor
+
+    if (!this.data.topic || !cursor || this.data.loadingComments) {
+      return
+    }
+
+    this.setData({ loadingComments: true })
+
+    return getSquareComments(this.data.topicId, { cursor })
+      .then((data) => {
+        const topic = this.data.topic
+        const comments = mergeComments(topic.comments, (data.items || []).map(normalizeComment))
+
+        this.setData({
+          topic: Object.assign({}, topic, { comments }),
+          commentsNextCursor: data.next_cursor || null
+        })
+      })
+      .catch(() => {
+        showToast('评论加载失败')
+      })
+      .finally(() => {
+        this.setData({ loadingComments: false })
+      })
+  },
+
   previewImage(event) {
     const src = event.currentTarget.dataset.src
 
@@ -208,6 +279,10 @@ Page({
     toggleSquareCommentLike(this.data.topicId, commentId)
       .then((topic) => {
         this.setTopic(topic)
+
+        if (topic) {
+          this.syncLoadedComment(topic, commentId, 'isLiked', 'likeCount')
+        }
       })
       .catch(() => {
         showToast('点赞失败')
@@ -220,6 +295,10 @@ Page({
     toggleSquareCommentFavorite(this.data.topicId, commentId)
       .then((topic) => {
         this.setTopic(topic)
+
+        if (topic) {
+          this.syncLoadedComment(topic, commentId, 'isFavorited', 'favoriteCount')
+        }
       })
       .catch(() => {
         showToast('收藏失败')
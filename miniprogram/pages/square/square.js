@@ -73,7 +73,8 @@ function normalizeTopic(topic) {
     isFavorited: Boolean(topic.isFavorited || topic.is_favorited),
     likeCount: topic.likeCount || topic.like_count || 0,
     favoriteCount: topic.favoriteCount || topic.favorite_count || 0,
-    shareCount: topic.shareCount || topic.share_count || 0
+    shareCount: topic.shareCount || topic.share_count || 0,
+    commentCount: topic.commentCount || topic.comment_count || comments.length
   }
 }
 
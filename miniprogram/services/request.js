@@ -3,6 +3,8 @@ const { getStorage, setStorage, removeStorage } = require('../utils/cache')
 const { showToast } = require('../utils/toast')
 
 let guestLoginTask = null
+const etagCache = new Map()
+const ETAG_CACHE_LIMIT = 50
 
 function getAppInstance() {
   return typeof getApp === 'function' ? getApp() : null
@@ -92,8 +94,29 @@ function showRequestToast(options, title, icon = 'none') {
   }
 }
 
+/**
+ * GET 请求按 url、参数和登录态记录 ETag，重复加载时服务端可以只回 304。
+ */
+function buildEtagKey(options, token) {
+  return `${options.url}|${JSON.stringify(options.data || {})}|${token}`
+}
+
+function rememberEtag(key, etag, data) {
+  etagCache.delete(key)
+  etagCache.set(key, { etag, body: JSON.stringify(data) })
+  if (etagCache.size > ETAG_CACHE_LIMIT) {
+    etagCache.delete(etagCache.keys().next().value)
+  }
+}
+
+function readHeader(headers = {}, name) {
+  const matched = Object.keys(headers).find((key) => key.toLowerCase() === name)
+  return matched ? headers[matched] : ''
+}
+
 function request(options) {
   const token = getStorage('token', '')
+  const method = options.method || 'GET'
   const header = Object.assign(
     {
       'content-type': 'application/json'
@@ -105,14 +128,25 @@ function request(options) {
     header.Authorization = `Bearer ${token}`
   }
 
+  const etagKey = method === 'GET' ? buildEtagKey(options, token) : ''
+  const cached = etagKey ? etagCache.get(etagKey) : null
+  if (cached) {
+    header['If-None-Match'] = cached.etag
+  }
+
   return new Promise((resolve, reject) => {
     wx.request({
       url: `${config.apiBaseUrl}${options.url}`,
-      method: options.method || 'GET',
+      method,
       data: options.data || {},
       header,
       timeout: config.requestTimeout,
       success(res) {
+        if (res.statusCode === 304 && cached) {
+          resolve(JSON.parse(cached.body))
+          return
+        }
+
         const response = res.data || {}
 
         if (res.statusCode === 401) {
@@ -146,7 +180,12 @@ function request(options) {
           return
         }
 
-        resolve(response.data !== undefined ? response.data : response)
+        const data = response.data !== undefined ? response.data : response
+        const etag = etagKey ? readHeader(res.header, 'etag') : ''
+        if (etag) {
+          rememberEtag(etagKey, etag, data)
+        }
+        resolve(data)
       },
       fail(error) {
         showRequestToast(options, '网络异常，请稍后重试')
@@ -89,6 +89,17 @@ function getSquareTopic(topicId) {
   })
 }
 
+function getSquareComments(topicId, params = {}) {
+  if (config.useMock) {
+    return Promise.resolve({ items: [], next_cursor: null, has_more: false })
+  }
+
+  return request({
+    url: `/square/feed/${topicId}/comments`,
+    data: params
+  })
+}
+
 function createSquareTopic(data) {
   if (config.useMock) {
     const storedTopics = getStoredTopics()
@@ -271,6 +282,7 @@ function toggleSquareCommentFavorite(topicId, commentId) {
 module.exports = {
   getSquareFeed,
   getSquareTopic,
+  getSquareComments,
   createSquareTopic,
   toggleSquareLike,
   toggleSquareFavorite,